@@ -15,6 +15,12 @@ def finished(si, workload):
             return False
     return True
 
+# shared random number generator for all inter-arrival time draws
+RNG = np.random.default_rng()
+
+# number of JSON lines to accumulate before each write to stdout
+OUTPUT_BATCH = 10000
+
 ## Generate request timestamps within a windown ([start,end]) from exponential
 #  distribution with mean = mu
 #
@@ -33,22 +39,43 @@ def generate_request_timestamps(start, end, mu):
     duration = end - start
     expected_num_requests = int(duration/mu)
 
-    inter_arrival_time = np.random.exponential(int(mu), (expected_num_requests, 1))
-    inter_arrival_time = np.ceil(inter_arrival_time)
-    inter_arrival_time_cumsum = np.cumsum(inter_arrival_time, axis=0)
+    inter_arrival_time = RNG.exponential(int(mu), expected_num_requests)
+    np.ceil(inter_arrival_time, out=inter_arrival_time)
+    inter_arrival_time_cumsum = np.cumsum(inter_arrival_time)
 
     # shift all timestamps by `start` so that they fall within the window
-    inter_arrival_time_cumsum = inter_arrival_time_cumsum + start
-    inter_arrival_time_cumsum = inter_arrival_time_cumsum.astype(int)
+    inter_arrival_time_cumsum += start
+    inter_arrival_time_cumsum = inter_arrival_time_cumsum.astype(np.int64, copy=False)
     timestamp = inter_arrival_time_cumsum[inter_arrival_time_cumsum <= end]
 
     return timestamp
 
 
+## Generate request timestamps for `num_users` users in one batch
+#
+# Same as `generate_request_timestamps` but draws the inter-arrival times of
+# all users from a single RNG call. Twice the expected number of requests is
+# drawn per user so that the window is almost always covered.
+#
+# @return a list of `num_users` arrays of timestamps, one per user
+def generate_request_timestamps_batch(start, end, mu, num_users):
+    duration = end - start
+    expected_num_requests = int(duration/mu)
+
+    inter_arrival_time = RNG.exponential(int(mu), (num_users, expected_num_requests * 2))
+    np.ceil(inter_arrival_time, out=inter_arrival_time)
+    inter_arrival_time_cumsum = np.cumsum(inter_arrival_time, axis=1)
+
+    inter_arrival_time_cumsum += start
+    inter_arrival_time_cumsum = inter_arrival_time_cumsum.astype(np.int64, copy=False)
+
+    return [row[row <= end] for row in inter_arrival_time_cumsum]
+
+
 # @param functions a list of function configuration objects
 def alternate_generator(functions, start, end, num_users):
     elm_type = [('timestamp', int), ('user_id', int), ('function_name', 'U100')]
-    workload = np.array([], dtype=elm_type)
+    chunks = []
     toolbar_width=40
     sys.stderr.write("[%s]" % (" " * toolbar_width))
     sys.stderr.flush()
@@ -56,27 +83,31 @@ def alternate_generator(functions, start, end, num_users):
     one_hundredth = (len(functions) * num_users) / toolbar_width
     i = 0
     for function in functions:
-        for user_id in range(0, num_users):
-            arrivals = generate_request_timestamps(start, end, function['mu'])
-            vfunc = np.frompyfunc(lambda x: (x, user_id, function['name']), 1, 1)
-            workload = np.append(workload, vfunc(arrivals).astype(elm_type))
+        user_arrivals = generate_request_timestamps_batch(start, end, function['mu'], num_users)
+        for user_id, arrivals in enumerate(user_arrivals):
+            block = np.empty(len(arrivals), dtype=elm_type)
+            block['timestamp'] = arrivals
+            block['user_id'] = user_id
+            block['function_name'] = function['name']
+            chunks.append(block)
             i += 1
             if i % one_hundredth == 0:
                 sys.stderr.write('*')
                 sys.stderr.flush()
             #print('User %d' % user_id, file=sys.stderr)
+    workload = np.concatenate(chunks) if chunks else np.array([], dtype=elm_type)
     return np.sort(workload, order=['timestamp'])
 
 
+## Map global user indices to (function index, per-function user id)
+#
+# @param num_user_cumsum cumulative sum of the number of users of each function
+# @param index a single global user index or an array of them
 def find_function_index_and_user_id(num_user_cumsum, index):
-
-    for i, cumsum in enumerate(num_user_cumsum):
-        if index < cumsum:
-            break
-    if i == 0:
-        return i, index
-    else:
-        return i, index - num_user_cumsum[i-1]
+    num_user_cumsum = np.asarray(num_user_cumsum)
+    i = np.searchsorted(num_user_cumsum, index, side='right')
+    offsets = np.concatenate(([0], num_user_cumsum[:-1]))
+    return i, index - offsets[i]
 
 
 if __name__ == "__main__":
@@ -93,13 +124,21 @@ if __name__ == "__main__":
 
     data = yaml.load(config, Loader=yaml.Loader) # a list of dicts
     workload = alternate_generator(data['functions'], data['start_time'], data['end_time'], data['num_users'])
+    out = sys.stdout
+    buf = []
     for request in workload[['timestamp', 'user_id', 'function_name']]:
-        print("%s" % json.dumps({
+        buf.append(json.dumps({
             'time': int(request[0]),
             'user_id': int(request[1]),
             'function': request[2],
             'payload': {'request': 42}
         }))
+        if len(buf) == OUTPUT_BATCH:
+            out.write('\n'.join(buf) + '\n')
+            buf.clear()
+    if buf:
+        out.write('\n'.join(buf) + '\n')
+    out.flush()
     exit()
 
     output_request_file = sys.argv[2]
@@ -47,169 +47,20 @@ The JSON string follows this format:
         }
     }
 """
-import json
+try:
+    import orjson as json
+except ImportError:
+    import json
 import yaml
 import sys
 import numpy as np
 import glob
+from collections import namedtuple
 import matplotlib.pyplot as plt
 #np.set_printoptions(threshold=sys.maxsize)
 
-SMALLEST_VM = 128
 NS2MS = 1000000
 
-def list_to_tuple_list(l):
-    if len(l) == 0:
-        return l
-
-    if len(l) % 2 == 1:
-        sys.exit("list has odd number of elements")
-
-    return [(l[i], l[i+1]) for i in range(0,len(l),2)]
-
-def in_tuple_range(tsp, tuple_range):
-    """Return whether a timestamp falls within a time range
-
-    tsp -- timestamp
-    tuple_range -- a tuple of (start timestamp, end timestamp)
-    """
-    return tsp>=tuple_range[0] and tsp<=tuple_range[1]
-
-def overlap(window, time_range):
-    """Return the amount of overlap time between 2 time ranges
-
-    0 if all of time_range precedes window
-    -1 if all of time_range follows window
-    overlap amount otherwise
-    """
-    if time_range[1] <= window[0]:
-        return 0
-
-    if time_range[0] >= window[1]:
-        return -1
-
-    l = [time_range[0], time_range[1], window[0], window[1]]
-    l.sort()
-
-    return l[2] - l[1]
-
-class VM(object):
-    def __init__(self, id, boot_tsp=[], req_rsp_tsp=[], evict_tsp=[], mem=0):
-        self.id = id
-        self.boot = list_to_tuple_list(boot_tsp)
-        self.req_rsp = list_to_tuple_list(req_rsp_tsp)
-        self.evict = list_to_tuple_list(evict_tsp)
-        self.stage = 0 
-        self.req_rsp_idx = 0
-        self.mem = mem 
-
-    def __str__(self):
-        return "id: " + str(self.id) + " boot: " + str(self.boot) + \
-                " req_rsp: " + str(self.req_rsp) + " evict: " + str(self.evict) +\
-                " mem size: " + str(self.mem)
-
-    def update(self, boot_tsp=[], req_rsp_tsp=[], evict_tsp=[], mem=0):
-        """
-        update information in a VM object that's already created
-        boot_tsp, evict_tsp and mem should only be set once.
-        req_rsp_tsp is appended to VM's req_rsp list
-        """
-        if self.mem == 0:
-            self.mem = mem
-        else: # report error if try to set mem more than once
-            if mem!= 0:
-                sys.exit("try to set mem twice in vm {}".format(self.id))
-
-        if self.boot == []:
-            self.boot = list_to_tuple_list(boot_tsp)
-        else:
-            if boot_tsp!=[]:
-                sys.exit("try to set boot_tsp twice in vm {}".format(self.id))
-
-        if self.evict == []:
-            self.evict = list_to_tuple_list(evict_tsp)
-        else:
-            if evict_tsp!=[]:
-                sys.exit("try to set evict_tsp twice in vm {}".format(self.id))
-
-        self.req_rsp = self.req_rsp + list_to_tuple_list(req_rsp_tsp)
-
-        return
-
-    def is_running(self, tsp):
-
-        for req_rsp_tuple in self.req_rsp:
-            if in_tuple_range(tsp, req_rsp_tuple):
-                return self.mem
-
-        return 0
-
-    def boot_time(self):
-        """Return the total amount of time that this VM spent in booting"""
-        return self.boot[0][1] - self.boot[0][0]
-
-    def runtime(self):
-        """Return the total amount of time that this VM spent running app code"""
-        runtime = 0
-        for r in self.req_rsp:
-            runtime = runtime + (r[1] - r[0])
-
-        return runtime
-
-    def evict_time(self):
-        """Return the total amount of time that this VM spent in eviction"""
-        if self.evict == []:
-            return 0
-
-        return self.evict[0][1] - self.evict[0][0]
-    
-    def idle_time(self):
-        """Return the total amount of time that this VM is up but not running app code"""
-        return self.uptime() - self.runtime()
-
-    def uptime(self):
-        """Return the total amount of time that VM is up"""
-        if self.evict == []:
-            return end_time - self.boot[0][1]
-
-        return self.evict[0][0] - self.boot[0][1]
-
-    def uptimestamp(self):
-        """Return the launch finish timestamp and shutdown start timestamp of this VM in a tuple"""
-        if self.evict == []:
-            return (self.boot[0][1], end_time)
-
-        return (self.boot[0][1], self.evict[0][0])
-
-    def lifetime(self):
-        """Return the total amount of time between start VM command and eviction finishes"""
-        if self.evict == []:
-            return end_time - self.boot[0][0]
-
-        return self.evict[0][1] - self.boot[0][0]
-
-    def lifetimestamp(self):
-        """Return the launch start timestamp and shutdown finish timestamp of this VM in a tuple"""
-        if self.evict == []:
-            return (self.boot[0][0], end_time)
-
-        return (self.boot[0][0], self.evict[0][1])
-
-    def runtime_in_window(self, window):
-        """Return the amount of time within a window that this VM spent running app code
-
-        windown -- a tuple representing a window
-        """
-        runtime = 0
-        for r in self.req_rsp:
-            ol = overlap(window, r)
-            if ol == -1:
-                break
-            runtime = runtime + ol
-
-        return runtime
-
-
 def process_single_trace(data):
     """
     given a JSON object (a dict objet returned by json.load())output from
@@ -218,23 +69,43 @@ def process_single_trace(data):
     2. the number of dropped requests
     3. the number of evictions
     4. the number of vms created
-    5. a list of VM objects.
+    5. the trace's VMs as arrays (see trace_to_arrays).
     as a tuple
     """
     return data['number of requests completed'],\
            data['number of requests dropped'],\
            data['number of evictions'],\
            data['number of vms created'],\
-           json_to_vms(data)
+           trace_to_arrays(data)
+
 
 
+# VMs as one array per field. The request/response timestamps of the i-th VM
+# are rr_start[rr_offsets[i]:rr_offsets[i+1]] and likewise for rr_end.
+# evict_start and evict_end are -1 for VMs that were never evicted.
+VMArrays = namedtuple('VMArrays', ['id', 'mem', 'boot_start', 'boot_end',
+                                   'evict_start', 'evict_end',
+                                   'rr_start', 'rr_end', 'rr_offsets'])
+
+def tsp_pair(tsp):
+    """Return the (start, end) of a list of timestamps, (-1, -1) if empty"""
+    if not tsp:
+        return -1, -1
+    if len(tsp) % 2 == 1:
+        sys.exit("list has odd number of elements")
+    return tsp[0], tsp[1]
 
-def json_to_vms(data):
+def trace_to_arrays(data):
     """
     given a JSON object (a dict objet returned by json.load()) output from
-    snapctr (format specified at the beginning of this file), create and return
-    a dict of VM objects with the key being the VM's ID and the value being the
-    VM object.
+    snapctr (format specified at the beginning of this file), return
+    1. an array of the IDs of the VMs in the trace
+    2. their memory sizes, 0 if not set in this trace
+    3. their boot (start, end) timestamps, -1 if not set in this trace
+    4. their eviction (start, end) timestamps, -1 if not set in this trace
+    5. the VM ID of each request/response
+    6. the request/response (start, end) timestamps
+    as a tuple
 
     Specifically, this function processes the following fields from the JSON
     object:
@@ -244,95 +115,122 @@ def json_to_vms(data):
     4. "vm memory sizes"
     """
     if data=={}:
-        return {}
-
-    vms = {}
-    vm_mem_sizes = data['vm memory sizes']
-    boot_tsp = data['boot timestamps']
-    evict_tsp = data['eviction timestamps']
-    req_rsp_tsp = data['request/response timestamps']
-
-    for key in vm_mem_sizes:
-        if key in vms:
-            sys.exit("key {} is already vm list".format(key))
-
-        vms[key] = VM(key, mem=vm_mem_sizes[key])
-
-    for key in boot_tsp:
-        if key in vms:
-            vms[key].update(boot_tsp=boot_tsp[key])
-        else:
-            vms[key] = VM(key, boot_tsp=boot_tsp[key])
-
-    for key in evict_tsp:
-        if key in vms:
-            vms[key].update(evict_tsp=evict_tsp[key])
-        else:
-            vms[key] = VM(key, evict_tsp=evict_tsp[key])
-
-    for key in req_rsp_tsp:
-        if key in vms:
-            vms[key].update(req_rsp_tsp=req_rsp_tsp[key])
-        else:
-            vms[key] = VM(key, req_rsp_tsp=req_rsp_tsp[key])
-
-    return vms
+        vm_mem_sizes = boot_tsp = evict_tsp = req_rsp_tsp = {}
+    else:
+        vm_mem_sizes = data['vm memory sizes']
+        boot_tsp = data['boot timestamps']
+        evict_tsp = data['eviction timestamps']
+        req_rsp_tsp = data['request/response timestamps']
+
+    # every VM that appears in any of the fields, each looked up once per field
+    keys = list(vm_mem_sizes.keys() | boot_tsp.keys() | evict_tsp.keys() | req_rsp_tsp.keys())
+    n = len(keys)
+    ids = np.fromiter(map(int, keys), dtype=np.int64, count=n)
+    mem = np.fromiter((vm_mem_sizes.get(key, 0) for key in keys), dtype=np.int64, count=n)
+    boot = np.fromiter((t for key in keys for t in tsp_pair(boot_tsp.get(key))),
+                       dtype=np.int64, count=2*n).reshape(-1, 2)
+    evict = np.fromiter((t for key in keys for t in tsp_pair(evict_tsp.get(key))),
+                        dtype=np.int64, count=2*n).reshape(-1, 2)
+
+    rr_lists = [req_rsp_tsp.get(key, ()) for key in keys]
+    rr_lens = np.fromiter(map(len, rr_lists), dtype=np.int64, count=n)
+    if (rr_lens % 2).any():
+        sys.exit("list has odd number of elements")
+    rr_ids = np.repeat(ids, rr_lens // 2)
+    rr = np.fromiter((t for l in rr_lists for t in l), dtype=np.int64,
+                     count=int(rr_lens.sum())).reshape(-1, 2)
+    return ids, mem, boot, evict, rr_ids, rr
 
-def merge_vms(v1, v2):
+def merge_traces(traces):
     """
-    merge 2 vms objects that have the same ID
-    merge means concat their req_rsp, boot and evict.
-    make sure that not both of them have non-empty boot and evict.
-    Also make sure that if both have non-zero mem, that they are the same value
+    merge the arrays of all traces of an experiment (each as returned by
+    trace_to_arrays) into a VMArrays, with every VM's requests sorted.
+    A VM may be split across traces, but only one of them may set its boot or
+    eviction, and all non-zero memory sizes set for it must agree.
     """
-    if v1.id != v2.id:
-        sys.exit("try to merge 2 vms with different ids")
+    ids, mem, boot, evict, rr_ids, rr = (np.concatenate(c) for c in zip(*traces))
+    uniq, inv = np.unique(ids, return_inverse=True)
 
-    if v1.boot!=[] and v2.boot!=[]:
-        sys.exit("try to merge 2 vms with different boot")
-
-    if v1.evict!=[] and v2.evict!=[]:
-        sys.exit("try to merge 2 vms with different evict")
-    if v1.mem!=0 and v2.mem!=0 and v1.mem!=v2.mem:
+    # at most one distinct non-zero memory size per VM
+    set_mem = np.unique(np.stack((inv, mem), axis=1)[mem != 0], axis=0)
+    if len(np.unique(set_mem[:, 0])) != len(set_mem):
         sys.exit("try to merge 2 vms with different mem")
-
-    v1.boot = v1.boot+v2.boot
-    v1.req_rsp = v1.req_rsp+ v2.req_rsp
-    v1.evict = v1.evict+v2.evict
-    v1.mem=max(v1.mem, v2.mem)
-    return v1
-
-def merge_vm_dicts(d1, d2):
+    merged_mem = np.zeros(len(uniq), dtype=np.int64)
+    merged_mem[set_mem[:, 0]] = set_mem[:, 1]
+
+    merged = {}
+    for name, tsp in (('boot', boot), ('evict', evict)):
+        has = inv[tsp[:, 0] >= 0]
+        if len(np.unique(has)) != len(has):
+            sys.exit("try to merge 2 vms with different {}".format(name))
+        merged[name] = np.full((len(uniq), 2), -1, dtype=np.int64)
+        merged[name][has] = tsp[tsp[:, 0] >= 0]
+
+    # one sort puts requests in VM order and each VM's in (start, end) order
+    rr_inv = np.searchsorted(uniq, rr_ids)
+    order = np.lexsort((rr[:, 1], rr[:, 0], rr_inv))
+    rr = rr[order]
+    rr_offsets = np.searchsorted(rr_inv[order], np.arange(len(uniq)+1))
+
+    return VMArrays(
+        id=uniq,
+        mem=merged_mem,
+        boot_start=merged['boot'][:, 0].copy(),
+        boot_end=merged['boot'][:, 1].copy(),
+        evict_start=merged['evict'][:, 0].copy(),
+        evict_end=merged['evict'][:, 1].copy(),
+        rr_start=rr[:, 0].copy(),
+        rr_end=rr[:, 1].copy(),
+        rr_offsets=rr_offsets)
+
+def runtime_in_window(soa, window):
+    """Return an array of the amount of time within a window that each VM
+    in a VMArrays spent running app code
+
+    window -- a tuple representing a window
     """
-    merge two dicts of VM objects. For example if both d1 and d2 has information
-    about VM whose ID is i, then merge those information into one VM object.
-    Return a single dict of VM objects with d1 and d2's VMs merged.
+    ol = np.minimum(soa.rr_end, window[1]) - np.maximum(soa.rr_start, window[0])
+    np.maximum(ol, 0, out=ol)
+    # every VM has at least one request, so no segment is empty
+    return np.add.reduceat(ol, soa.rr_offsets[:-1])
+
+def runtimemb_in_windows(soa, lo, hi):
+    """Return an array of, for each window [lo[i], hi[i]], the sum over the VMs
+    in a VMArrays of the time spent running app code within the window times
+    the VM's memory size
     """
-    for key in d1:
-        if key in d2:
-            d2[key] = merge_vms(d1[key], d2[key])
-        else:
-            d2[key] = d1[key]
-    return d2
-
-def check_vm(vm):
-    return (vm.mem!=0) and vm.boot!=[] and vm.req_rsp!=[]
-
-def validate(vms, stat):
+    # The memory-time that requests ran up to t is
+    #   sum(mem * (t - start) for start <= t) - sum(mem * (t - end) for end <= t)
+    # and with both sums taken as prefix sums over sorted timestamps, the
+    # amount within each window is the difference of two binary searches.
+    mem = np.repeat(soa.mem, np.diff(soa.rr_offsets)).astype(np.float64)
+    # timestamps are taken relative to the first request to keep sums small
+    origin = soa.rr_start.min()
+    lo = lo - origin
+    hi = hi - origin
+    runtimemb = np.zeros(len(lo))
+    for ts, sign in ((soa.rr_start, 1), (soa.rr_end, -1)):
+        order = np.argsort(ts)
+        ts = (ts[order] - origin).astype(np.float64)
+        m = np.concatenate(([0.], np.cumsum(mem[order])))
+        mt = np.concatenate(([0.], np.cumsum(mem[order] * ts)))
+        for t, tsign in ((hi, 1), (lo, -1)):
+            i = np.searchsorted(ts, t, side='right')
+            runtimemb += sign * tsign * (t * m[i] - mt[i])
+    return runtimemb
+
+def validate(soa, stat):
     """
-    Make sure the data generated in the vm dict agrees with measured stat data.
-    Also, make sure the VM objects are valid (see check_vm for details)
+    Make sure the data merged into a VMArrays agrees with measured stat data.
+    Also, make sure every VM has a memory size, a boot and at least one request
     """
-    assert(len(vms) == stat[3])
-    num_complete = 0
-    num_evict = 0
-    for v in list(vms.values()):
-        assert(check_vm(v))
-        num_complete = num_complete+len(v.req_rsp)
-        num_evict = num_evict+len(v.evict)
+    assert(len(soa.id) == stat[3])
+    assert(soa.mem.all())
+    assert((soa.boot_start >= 0).all())
+    assert((np.diff(soa.rr_offsets) > 0).all())
 
-    assert(num_complete==stat[0])
-    assert(num_evict==stat[2])
+    assert(soa.rr_offsets[-1]==stat[0])
+    assert(np.count_nonzero(soa.evict_start >= 0)==stat[2])
 
 
 def process_experiment(experiment_dir):
@@ -353,40 +251,32 @@ def process_experiment(experiment_dir):
     num_workers = len(stat_files)
 
     stat = np.array([0,0,0,0])
-    vms = {}
+    # an empty trace, so that there is something to merge without any workers
+    traces = [trace_to_arrays({})]
     for f in stat_files:
-        measurement_file = open(os.path.join(experiment_dir, f), 'r')
-        data = json.load(measurement_file)
-        measurement_file.close()
-        *s, v = process_single_trace(data)
+        with open(os.path.join(experiment_dir, f), 'rb') as measurement_file:
+            data = json.loads(measurement_file.read())
+        *s, trace = process_single_trace(data)
         s = np.array(s)
-        stat, vms = stat + s, merge_vm_dicts(vms, v)
+        stat = stat + s
+        traces.append(trace)
 
-    # sort every vm's req_rsp
-    for v in list(vms.values()):
-        v.req_rsp.sort()
+    # merge all traces at once, which also sorts every vm's req_rsp
+    soa = merge_traces(traces)
 
     # make sure the data makes sense
-    validate(vms, stat)
+    validate(soa, stat)
 
-    vms = list(vms.values())
-
-    if len(vms) == 0:
+    if len(soa.id) == 0:
         print("Zero vms created. No more analysis left to do. Exiting...")
         exit(0)
 
     # find the experiment start time as the boot start timestamp of the first VM
     # find the experiment end time as the complete timestamp of the last request
-    start_time = vms[0].boot[0][0]
-    end_time = vms[0].req_rsp[-1][1]
+    start_time = int(soa.boot_start.min())
+    end_time = int(soa.rr_end[soa.rr_offsets[1:]-1].max())
     duration = (end_time-start_time)/NS2MS
 
-    for vm in vms:
-        if vm.boot[0][0] < start_time:
-            start_time = vm.boot[0][0]
-        if vm.req_rsp[-1][1]> end_time:
-            end_time = vm.req_rsp[-1][1]
-
     result["num workers"]=num_workers
     result["cluster memory"]=result["num workers"]*128
     result["num vms created"]=stat[3]
@@ -407,9 +297,9 @@ def process_experiment(experiment_dir):
     #total_runtimeMB += vm.runtime() * vm.mem
 
 
-    return (result, vms)
+    return (result, soa)
 
-def plot_throughput(start_time, end_time, window_size, vms, plot_name):
+def plot_throughput(start_time, end_time, window_size, soa, plot_name):
     # Throughput Plot
     # calculate throughput utilization over the timespan of the experiment
     # We use a sliding window approach. Throughput is calculated as the number of
@@ -417,21 +307,13 @@ def plot_throughput(start_time, end_time, window_size, vms, plot_name):
     # to get #req/sec
     window_size = window_size*1000000 #ms * 1000000 = ns
 
-    throughput = []
-    wt = start_time + window_size / 2
-    while wt < end_time:
-        window = (wt - window_size / 2, wt + window_size / 2)
-        completed = 0;
-        for vm in vms:
-            for r in vm.req_rsp:
-                if r[1] >= window[0] and r[1]<=window[1]:
-                    completed = completed +1
-
-        throughput.append(completed/(window_size/(1000*1000000))) # #req/sec
-
-        wt = wt + window_size
-
-    throughput = np.array(throughput)
+    # completion timestamps of all requests, sorted so that the number
+    # completed within each window is the distance between two binary searches
+    ends = np.sort(soa.rr_end)
+    wt = np.arange(start_time + window_size / 2, end_time, window_size)
+    completed = np.searchsorted(ends, wt + window_size / 2, side='right') - \
+                np.searchsorted(ends, wt - window_size / 2, side='left')
+    throughput = completed/(window_size/(1000*1000000)) # #req/sec
 
     # plot
     x = np.linspace(0, (end_time/(NS2MS*1000) - start_time/(NS2MS*1000) ), len(throughput)  )
@@ -444,130 +326,28 @@ def plot_throughput(start_time, end_time, window_size, vms, plot_name):
     plt.title('Throughput')
     plt.savefig(plot_name)
 
-    return
-
-
-
-    # Old:
-    start_time = data['start time']/NS2MS
-    end_time = data['end time']/NS2MS
-    num_vm = len(data['boot timestamps'])
-    total_mem = data['total mem']
-    resource_limit = int(total_mem/SMALLEST_VM) # the maximum number of 128MB VMs that the cluster can support
-
-    #function_config_file = open(sys.argv[2], 'r')
-    #config = yaml.load(function_config_file.read(), Loader=yaml.Loader)
-    #function_config_file.close()
-    # get mem size for each function
-    #function_to_memsize = {}
-    #for function in config:
-    #    name = function['name']
-    #    mem = function['memory']
-    #    function_to_memsize[name] = mem
-    #
-    #print(function_to_memsize)
-
-    # scheduler latency
-    schedule_latency = np.array(data['request schedule latency'])
-    schedule_latency = schedule_latency / NS2MS
-
-    # calculate high-level aggregate metrics
-    vms = []
-    all_req_res = []
-    all_eviction_tsp = []
-    all_boot_tsp = []
-    for vm_id in range(3, 3+num_vm,1):
-        mem_size = data['vm mem sizes'][str(vm_id)]
-        boot_tsp = [l/NS2MS for l in data['boot timestamps'][str(vm_id)]]
-        req_res_tsp = [l/NS2MS for l in data['request/response timestamps'][str(vm_id)]]
-        all_req_res = all_req_res+req_res_tsp
-        all_boot_tsp = all_boot_tsp + boot_tsp
-
-        try:
-            evict_tsp = [l/NS2MS for l in data['eviction timestamps'][str(vm_id)]]
-            all_eviction_tsp = all_eviction_tsp + evict_tsp
-        except:
-            evict_tsp = []
-
-        vm = VM(vm_id, boot_tsp, req_res_tsp, evict_tsp, mem_size)
-        vms.append(vm)
-
-
-    total_idle_time = 0
-    total_boot_time = 0
-    total_eviction_time = 0
-    total_runtime = 0
-    total_runtimeMB = 0
-    total_idle_timeMB = 0
-    total_eviction_timeMB = 0
-    total_boot_timeMB = 0
-
-
-    #    print("vm {}, uptime: {}, runtime: {}, idle time: {}, boot time: {}, evict time: {}"\
-    #            .format(vm.id,\
-    #                vm.uptime()/1000000,\
-    #                vm.runtime()/1000000,
-    #                vm.idle_time()/1000000,\
-    #                vm.boot_time()/1000000,\
-    #                vm.evict_time()/1000000))
-
-    total_time = total_runtime + total_idle_time + total_boot_time + total_eviction_time
-    total_experiment_duration = (end_time - start_time)
-
-    print("cluster size: {}MB".format(total_mem))
-    print('cluster can support ' + str(resource_limit) + ' 128MB VMs')
-    print("booted a total of " + str(num_vm) + " VMs")
-    print('number of completed requests: {}'.format(data['number of completed requests']))
-    print('number of dropped requests (resource exhaustion): {}'.format(data['drop requests (resource)']))
-    print('number of dropped requests (concurrency limit): {}'.format(data['drop requests (concurrency)']))
-    print('number of evictions: {}'.format(data['number of evictions']))
-    print('cumulative throughput: {0:.2f}'.format(data['cumulative throughput']))
-    print("experiment duration: {0:.2f}ms".format(total_experiment_duration))
-    print("total time (spent by all VMs): {0:.2f}ms".format(total_time))
-    print("total runtime time: {0:.2f}ms".format(total_runtime))
-    print("total idle time: {0:.2f}ms".format(total_idle_time))
-    print("total boot time: {0:.2f}ms".format(total_boot_time))
-    print("total eviction time: {0:.2f}ms".format(total_eviction_time))
-    #print("total runtimeMB (ms-MB): {}ms-MB".format(int(total_runtimeMB)))
-    print("type 1 utilization: {0:.2f}%".format(100*total_runtimeMB/(total_experiment_duration*total_mem)))
-    print("type 2 utilization: {0:.2f}%".format(100*total_runtimeMB/(total_runtimeMB + total_eviction_timeMB + total_boot_timeMB)))
-
-    print("average scheduling latency: {0:.2f}ms".format(np.mean(schedule_latency)))
-
-
-    # calculate utilization over the timespan of the experiment
-    utilization1 = []
-    utilization2 = []
-    runtimemb_all = []
-    window_size = 6000 #ms
-
-    wt = start_time + window_size / 2
-    while wt < end_time:
-        window = (wt - window_size / 2, wt + window_size / 2)
-        running = 0
-        runtimemb = 0
-        for vm in vms:
-            runtimemb = runtimemb + vm.runtime_in_window(window) * vm.resource
-
-        utilization1.append(runtimemb/(window_size*total_mem))
-
-        wt = wt + window_size
-
-    utilization1 = np.array(utilization1) * 100
+def plot_utilization(start_time, end_time, window_size, soa, total_mem, plot_name):
+    # Utilization Plot
+    # calculate memory utilization over the timespan of the experiment
+    # We use a sliding window approach. Utilization is calculated as the sum of
+    # each VM's time spent running app code within a window times its memory
+    # size, over the length of the window times the cluster memory
+    window_size = window_size*1000000 #ms * 1000000 = ns
+
+    wt = np.arange(start_time + window_size / 2, end_time, window_size)
+    runtimemb = runtimemb_in_windows(soa, wt - window_size / 2, wt + window_size / 2)
+    utilization = runtimemb/(window_size*total_mem) * 100
 
     # plot
-    x = np.linspace(0, (end_time - start_time ), len(utilization1)  )
+    x = np.linspace(0, (end_time/(NS2MS*1000) - start_time/(NS2MS*1000) ), len(utilization)  )
 
     fig = plt.figure()
     fig.set_size_inches(8,5)
-    plt.plot(x, utilization1)
-    plt.xlabel('time(ms)')
+    plt.plot(x, utilization)
+    plt.xlabel('time(s)')
     plt.ylabel('Utilization (%)')
     plt.title('Utilization')
-    plt.legend()
-    plt.savefig('test.png')
-
-    plt.show()
+    plt.savefig(plot_name)
 
 if __name__ == '__main__':
     stat, vms = process_experiment(sys.argv[1])
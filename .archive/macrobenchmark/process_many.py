@@ -2,6 +2,7 @@ import process_data
 import sys
 import os
 import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
 
 def process_experiments(experiments_dir):
     print("processing experiments under {}".format(experiments_dir))
@@ -9,7 +10,11 @@ def process_experiments(experiments_dir):
     experiments = [d for d in os.listdir(experiments_dir) if os.path.isdir(os.path.join(experiments_dir,d))]
     print(experiments)
 
-    results = [process_data.process_experiment(os.path.join(experiments_dir, d)) for d in experiments]
+    # experiments are independent of each other, so process them in parallel
+    paths = [os.path.join(experiments_dir, d) for d in experiments]
+    chunksize = max(1, len(paths) // (4 * (os.cpu_count() or 1)))
+    with ProcessPoolExecutor() as ex:
+        results = list(ex.map(process_data.process_experiment, paths, chunksize=chunksize))
     results = sorted(results, key = lambda i: i[0]['cluster memory']) 
 
     return results
@@ -1,43 +1,65 @@
 #!/usr/bin/env python3
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from collections import defaultdict
 import sys
 import numpy as np
 
+NUM_LINES = 7
+# value of each `NAME: VALUE UNIT` line
+LINE_VALUE = re.compile(r'.*: (-?\d+)')
+
 dirs = os.listdir('./out')
 boot_versions = {}
 exec_versions = {}
+app_names = {}
+
+def parse_file(path):
+    """Return (boot time, exec time) recorded in one output file"""
+    with open(path) as infile:
+        # only the first NUM_LINES lines carry values
+        lines = list(islice(infile, NUM_LINES))
+        json_time = int(LINE_VALUE.match(lines[0])[1])
+        preconfig_time = int(LINE_VALUE.match(lines[1])[1])
+        boot_incl_preconfig = int(LINE_VALUE.match(lines[5])[1])
+        boot_time = boot_incl_preconfig - preconfig_time
+        exec_time = int(LINE_VALUE.match(lines[6])[1])
+        return boot_time, exec_time
 
 filtered_app = {'tpcc', 'hello'}
+pool = ThreadPoolExecutor(max_workers=32)
 for dir in dirs:
-    data = defaultdict(list)
-    for txt in os.listdir(os.path.join('./out', dir)):
-        app = txt.split('.')[0]   
+    data = defaultdict(lambda: np.zeros(2, dtype=np.int64))
+    counts = defaultdict(int)
+    apps = []
+    paths = []
+    for entry in os.scandir(os.path.join('./out', dir)):
+        app = entry.name.split('.')[0]
         if app == 'tpcc-java':
             continue
         if 'hello' in app:
             continue
-        with open(os.path.join('./out', dir, txt)) as infile:
-            lines = infile.readlines()
-            json_time = int(lines[0].split(': ')[-1].split()[0])
-            preconfig_time = int(lines[1].split(': ')[-1].split()[0])
-            boot_incl_preconfig = int(lines[5].split(': ')[-1].split()[0])
-            boot_time = boot_incl_preconfig - preconfig_time
-            exec_time = int(lines[6].split(': ')[-1].split()[0])
-            data[app].append((boot_time, exec_time))
-
+        apps.append(app)
+        paths.append(entry.path)
+    for app, times in zip(apps, pool.map(parse_file, paths)):
+        data[app] += times
+        counts[app] += 1
 
     boot_data = []
     exec_data = []
     for app in sorted(data.keys()):
-        data[app] = np.sum(data[app], axis=0) / len(data[app])
+        data[app] = data[app] / counts[app]
         boot_data.append(data[app][0])
         exec_data.append(data[app][1])
 
     ver = '-'.join(dir.split('-')[:-3])
     boot_versions[ver] = boot_data
     exec_versions[ver] = exec_data
+    app_names[ver] = sorted(data.keys())
     # print(dir)
+pool.shutdown()
 
 base_version = 'snapfaas-reap'
 base_boot = np.array(boot_versions[base_version])
@@ -59,26 +81,13 @@ for ver in exec_versions.keys():
     if ver != base_version:
         normalized_e2e[ver] = (np.array(exec_versions[ver]) + np.array(boot_versions[ver])) / base_exec
 
-cols = ['normalized boot']
-cols.extend(sorted(data.keys()))
-print(','.join(cols))
-for ver in normalized_boot.keys():
-    cols = [ver]
-    cols.extend(map(str, normalized_boot[ver]))
-    print(','.join(cols))
-
-cols = ['normalized exec']
-cols.extend(sorted(data.keys()))
-print(','.join(cols))
-for ver in normalized_exec.keys():
-    cols = [ver]
-    cols.extend(map(str, normalized_exec[ver]))
-    print(','.join(cols))
-
-cols = ['normalized e2e']
-cols.extend(sorted(data.keys()))
-print(','.join(cols))
-for ver in normalized_e2e.keys():
-    cols = [ver]
-    cols.extend(map(str, normalized_e2e[ver]))
-    print(','.join(cols))
+# every version is normalized against the base version's apps, so label the
+# columns with those rather than with whichever directory was parsed last
+rows = []
+for title, normalized in [('normalized boot', normalized_boot),
+                          ('normalized exec', normalized_exec),
+                          ('normalized e2e', normalized_e2e)]:
+    rows.append(','.join([title, *app_names[base_version]]))
+    for ver, values in normalized.items():
+        rows.append(','.join([ver, *map(str, values)]))
+sys.stdout.write('\n'.join(rows) + '\n')
@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 import os
+import re
+from itertools import islice
 from collections import defaultdict
 import sys
 import numpy as np
 
+NUM_LINES = 8
+# value of each `NAME: VALUE UNIT` line
+LINE_VALUE = re.compile(rb'.*: (-?\d+)')
+
 out_dir = './new_out'
 dirs = os.listdir(out_dir)
 versions = {}
@@ -19,53 +25,58 @@ for i, name in enumerate(rows[0]):
     regular_execs[name] = float(rows[1][i])
 # print(regular_execs)
 for dir in dirs:
-    data = defaultdict(list)
+    data = defaultdict(lambda: np.zeros(4, dtype=np.int64))
+    counts = defaultdict(int)
     for txt in os.listdir(os.path.join(out_dir, dir)):
         app = txt.split('.')[0]
-        with open(os.path.join(out_dir, dir, txt)) as infile:
-            lines = infile.readlines()
-            
-            # mem
-            memory_restore = int(lines[0].split(': ')[-1].split()[0])
-            
+        with open(os.path.join(out_dir, dir, txt), 'rb') as infile:
+            # only the first NUM_LINES lines carry values
+            lines = list(islice(infile, NUM_LINES))
+            memory_restore = int(LINE_VALUE.match(lines[0])[1])
+            json_time = int(LINE_VALUE.match(lines[1])[1])
+            preconfig_time = int(LINE_VALUE.match(lines[2])[1])
+            tot_restore_time = int(LINE_VALUE.match(lines[3])[1])
+            boot_incl_preconfig = int(LINE_VALUE.match(lines[6])[1])
+            exec_time = int(LINE_VALUE.match(lines[7])[1])
+
             # c
-            tot_restore_time = int(lines[3].split(': ')[-1].split()[0])
             other_restore_time =  tot_restore_time - memory_restore
-            json_time = int(lines[1].split(': ')[-1].split()[0])
-            preconfig_time = int(lines[2].split(': ')[-1].split()[0])
             constant = json_time + preconfig_time + other_restore_time
 
             # remaining initialization
-            boot_incl_preconfig = int(lines[6].split(': ')[-1].split()[0])
             remaining_init = boot_incl_preconfig - json_time - preconfig_time - tot_restore_time
 
-            # exec
-            exec_time = int(lines[7].split(': ')[-1].split()[0]) 
-
-            data[app].append([constant, memory_restore, remaining_init, exec_time])
+            data[app] += (constant, memory_restore, remaining_init, exec_time)
+            counts[app] += 1
 
     for app in sorted(data.keys()):
-        data[app] = np.sum(data[app], axis=0) / len(data[app])
+        data[app] = data[app] / counts[app]
         data[app][-1] = data[app][-1] - regular_execs[app] * 1000
 
     ver = '-'.join(dir.split('-')[:-3])
     versions[ver] = data
 
+sorted_versions = sorted(versions.keys())
 # version1 version2 version3 version4
-headers1 = ',' + ','.join(map(lambda s: s+',,,', sorted(versions.keys())))
+headers1 = ',' + ','.join(map(lambda s: s+',,,', sorted_versions))
 # constant || memory_restore || remaining_init || exec_time
 headers2 = ',' + ','.join(['constant,memory_restore,remaining_init,exec']*4)
 # name, (data, data, data ,data) * 4
 print(headers1)
 print(headers2)
 lang = ''
-for app in sorted(data.keys(), key=lambda x: x.split('-')[-1] + '-'.join(x.split('-')[:-1])):
+# sort by language first, then by app name
+def lang_and_name(app):
+    """Return (language, name without language, app) of an app named NAME-LANG"""
+    name, _, lang = app.rpartition('-')
+    return lang, name, app
+sorted_apps = sorted(map(lang_and_name, data.keys()))
+for this_lang, name, app in sorted_apps:
     row = []
-    this_lang = app.split('-')[-1]
     if this_lang != lang:
         lang = this_lang
         print(lang+','*16)
-    for ver in sorted(versions.keys()):
+    for ver in sorted_versions:
         row.extend(versions[ver][app])
-    row = ','.join(['-'.join(app.split('-')[:-1]), ','.join(map(lambda x: str(round(x, 1)), np.array(row)/1000))])
+    row = ','.join([name, ','.join(map(lambda x: str(round(x, 1)), np.array(row)/1000))])
     print(row)
@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 import os
+import re
+from itertools import islice
 from collections import defaultdict
 import sys
 import numpy as np
 
+NUM_LINES = 8
+# value of each `NAME: VALUE UNIT` line
+LINE_VALUE = re.compile(rb'.*: (-?\d+)')
+
 dirs = os.listdir('./out')
 boot_versions = {}
 exec_versions = {}
@@ -17,13 +23,14 @@ for dir in dirs:
             continue
         if 'hello' in app:
             continue
-        with open(os.path.join('./out', dir, txt)) as infile:
-            lines = infile.readlines()
-            json_time = int(lines[1].split(': ')[-1].split()[0])
-            preconfig_time = int(lines[2].split(': ')[-1].split()[0])
-            boot_incl_preconfig = int(lines[6].split(': ')[-1].split()[0])
+        with open(os.path.join('./out', dir, txt), 'rb') as infile:
+            # only the first NUM_LINES lines carry values
+            lines = list(islice(infile, NUM_LINES))
+            json_time = int(LINE_VALUE.match(lines[1])[1])
+            preconfig_time = int(LINE_VALUE.match(lines[2])[1])
+            boot_incl_preconfig = int(LINE_VALUE.match(lines[6])[1])
+            exec_time = int(LINE_VALUE.match(lines[7])[1])
             boot_time = boot_incl_preconfig - preconfig_time
-            exec_time = int(lines[7].split(': ')[-1].split()[0])
             data[app].append((boot_time, exec_time))
 
 
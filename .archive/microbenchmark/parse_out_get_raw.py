@@ -1,31 +1,46 @@
 #!/usr/bin/env python3
 import os
+import re
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict
 import sys
 import numpy as np
 
+NUM_LINES = 8
+# value of each `NAME: VALUE UNIT` line
+LINE_VALUE = re.compile(rb'.*: (-?\d+)')
+
 dirs = os.listdir('./out')
 boot_versions = {}
 exec_versions = {}
 
+def parse_file(path):
+    """Return (boot time, exec time) recorded in one output file"""
+    with open(path, 'rb') as infile:
+        # only the first NUM_LINES lines carry values
+        lines = list(islice(infile, NUM_LINES))
+    preconfig_time = int(LINE_VALUE.match(lines[2])[1])
+    boot_incl_preconfig = int(LINE_VALUE.match(lines[6])[1])
+    exec_time = int(LINE_VALUE.match(lines[7])[1])
+    return boot_incl_preconfig - preconfig_time, exec_time
+
 filtered_app = {'tpcc', 'hello'}
+pool = ThreadPoolExecutor()
 for dir in dirs:
     data = defaultdict(list)
+    apps = []
+    paths = []
     for txt in os.listdir(os.path.join('./out', dir)):
         app = txt.split('.')[0]
         if app == 'tpcc-java':
             continue
         if 'hello' in app:
             continue
-        with open(os.path.join('./out', dir, txt)) as infile:
-            lines = infile.readlines()
-            memory_restore_time = int(lines[0].split(': ')[-1].split()[0])
-            json_time = int(lines[1].split(': ')[-1].split()[0])
-            preconfig_time = int(lines[2].split(': ')[-1].split()[0])
-            boot_incl_preconfig = int(lines[6].split(': ')[-1].split()[0])
-            boot_time = boot_incl_preconfig - preconfig_time
-            exec_time = int(lines[7].split(': ')[-1].split()[0])
-            data[app].append((boot_time, exec_time))
+        apps.append(app)
+        paths.append(os.path.join('./out', dir, txt))
+    for app, times in zip(apps, pool.map(parse_file, paths)):
+        data[app].append(times)
 
     boot_data = []
     exec_data = []
@@ -37,6 +52,7 @@ for dir in dirs:
     ver = '-'.join(dir.split('-')[:-3])
     boot_versions[ver] = boot_data
     exec_versions[ver] = exec_data
+pool.shutdown()
 
 cols = ['boot latency (us)']
 cols.extend(sorted(data.keys()))
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
+import csv
 import os
+import multiprocessing as mp
 import print_host_latencies as print_host
+from util import sortAppName
 from collections import defaultdict
 import sys
 
@@ -10,45 +13,43 @@ if len(sys.argv) != 2:
 
 report_directory = sys.argv[1]
 
-def sortAppName(appname):
-    return appname.split('-')[-1] + '-'.join(appname.split('-')[:-1])
-
 styles=['fullapp-eager', 'snapfaas-eager', 'regular']
 ept_exit_reason = ['EPT_VIOLATION', 'EPT_MISCONFIG', 'EPT_VIOLATION-mmio', 'HLT']
-with open('ept_counts.txt', 'w') as ofile:
-    print(','.join(['function name', ','.join(['# of ' + x for x in ept_exit_reason]), ','.join(['mean latency of ' + x for x in ept_exit_reason])]), file=ofile)
+
+def parse_file(fpath, skip_until):
+    """Return the count and the total latency of each EPT exit reason in one report"""
+    try:
+        latencies, counts, *_ = print_host.parse_report(fpath, skip_until=skip_until)
+    except (IndexError, ValueError):
+        print(fpath)
+        raise
+    return [counts[reason] for reason in ept_exit_reason], [sum(latencies[reason]) for reason in ept_exit_reason]
+
+# reports are parsed in worker processes; fork so that workers do not
+# re-run this script
+with open('ept_counts.txt', 'w', newline='') as ofile, mp.get_context('fork').Pool() as pool:
+    writer = csv.writer(ofile, lineterminator='\n')
+    writer.writerow(['function name', *['# of ' + x for x in ept_exit_reason], *['mean latency of ' + x for x in ept_exit_reason]])
     for style in styles:
         round_counts = defaultdict(lambda: defaultdict(list))
         round_sums = defaultdict(lambda: defaultdict(list))
-        print(style, file=ofile)
+        writer.writerow([style])
         d = os.path.join(report_directory, style + '-report-out')
         files = os.listdir(d)
-        for f in files:
-            fpath = os.path.join(d, f)
-            with open(fpath) as infile:
-                ## discard all lines before the first write to 0x3f0
-                #for line in infile:
-                #    if '0x3f0' in line:
-                #        break
-                # only regular has a second write to 0x3f0
-                # discard all lines before this second write
-                if style == styles[-1]:
-                    for line in infile:
-                        if '0x3f0' in line:
-                            break
-                try:
-                    latencies, counts, _, _, _, _ = print_host.parse_report('', infile=infile)
-                except IndexError:
-                    print(fpath)
-                    sys.exit(1)
-                except ValueError:
-                    print(fpath)
-                    sys.exit(1)
+        ## discard all lines before the first write to 0x3f0
+        #skip_until = b'0x3f0'
+        # only regular has a second write to 0x3f0
+        # discard all lines before this second write
+        skip_until = b'0x3f0' if style == styles[-1] else None
+        try:
+            results = pool.starmap(parse_file, [(os.path.join(d, f), skip_until) for f in files])
+        except (IndexError, ValueError):
+            sys.exit(1)
+        for f, (counts, sums) in zip(files, results):
             app = f.split('.')[0]
-            for reason in ept_exit_reason:
-                round_counts[app][reason].append(counts[reason])
-                round_sums[app][reason].append(sum(latencies[reason]))
+            for reason, count, total in zip(ept_exit_reason, counts, sums):
+                round_counts[app][reason].append(count)
+                round_sums[app][reason].append(total)
         for k in sorted(round_counts.keys(), key=sortAppName):
-            resstr = ','.join([k, ','.join([str(sum(round_counts[k][reason])/len(round_counts[k][reason])) for reason in ept_exit_reason]),
-                ','.join([str(sum(round_sums[k][reason])/sum(round_counts[k][reason])) if sum(round_counts[k][reason]) != 0 else '0' for reason in ept_exit_reason])])
-            print(resstr, file=ofile)
+            writer.writerow([k, *[sum(round_counts[k][reason])/len(round_counts[k][reason]) for reason in ept_exit_reason],
+                *[sum(round_sums[k][reason])/sum(round_counts[k][reason]) if sum(round_counts[k][reason]) != 0 else '0' for reason in ept_exit_reason]])
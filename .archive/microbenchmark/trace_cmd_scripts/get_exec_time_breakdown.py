@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
+import csv
 import os
+import multiprocessing as mp
 import print_host_latencies as print_host
+from util import sortAppName
 from collections import defaultdict
 import sys
+import numpy as np
 
 if len(sys.argv) != 2:
     print('usage: python3 get_exec_time_breakdown.py REPORT_DIRECTORY')
@@ -10,8 +14,6 @@ if len(sys.argv) != 2:
 
 report_directory = sys.argv[1]
 
-def sortAppName(appname):
-    return appname.split('-')[-1] + '-'.join(appname.split('-')[:-1])
 #get latencies
 #latency_dirs=['../fullapp-eager-latency-out',
 #        '../snapfaas-eager-latency-out',
@@ -32,34 +34,39 @@ def sortAppName(appname):
 
 styles=['fullapp-eager', 'snapfaas-eager', 'regular']
 exit_reason_ordering = ['EPT_VIOLATION', 'EPT_MISCONFIG', 'EPT_VIOLATION-mmio', 'HLT', 'EXTERNAL_INTERRUPT', 'PREEMPTION_TIMER', 'MSR_WRITE']
-with open('breakdown.raw.txt', 'w') as ofile:
-    print(','.join(['function name', ','.join(exit_reason_ordering)]), file=ofile)
+
+def parse_file(fpath, skip_until):
+    """Return the total latency of each exit reason in one report"""
+    latencies, *_ = print_host.parse_report(fpath, skip_until=skip_until)
+    return {r: sum(l) for r, l in latencies.items()}
+
+# reports are parsed in worker processes; fork so that workers do not
+# re-run this script
+with open('breakdown.raw.txt', 'w', newline='') as ofile, mp.get_context('fork').Pool() as pool:
+    writer = csv.writer(ofile, lineterminator='\n')
+    writer.writerow(['function name', *exit_reason_ordering])
     for style in styles:
-        round_latencies = defaultdict(lambda: defaultdict(list))
-        print(style, file=ofile)
+        # app -> one {exit reason: total latency} per round
+        round_latencies = defaultdict(list)
+        writer.writerow([style])
         d = os.path.join(report_directory, style + '-report-out')
         files = os.listdir(d)
-        for f in files:
-            fpath = os.path.join(d, f)
-            with open(fpath) as infile:
-                ## discard all lines before the first write to 0x3f0
-                #for line in infile:
-                #    if '0x3f0' in line:
-                #        break
-                # only regular has a second write tto 0x3f0
-                # discard all lines before this second write
-                if style == styles[-1]:
-                    for line in infile:
-                        if '0x3f0' in line:
-                            break
-                latencies, _, _, _, _, _ = print_host.parse_report('', infile=infile)
-            app = f.split('.')[0]
-            for r, l in latencies.items():
-                round_latencies[app][r].append(sum(l))
+        ## discard all lines before the first write to 0x3f0
+        #skip_until = b'0x3f0'
+        # only regular has a second write tto 0x3f0
+        # discard all lines before this second write
+        skip_until = b'0x3f0' if style == styles[-1] else None
+        results = pool.starmap(parse_file, [(os.path.join(d, f), skip_until) for f in files])
+        for f, sums in zip(files, results):
+            round_latencies[f.split('.')[0]].append(sums)
         for k in sorted(round_latencies.keys(), key=sortAppName):
-            num_rounds = len(round_latencies[k]['EPT_MISCONFIG'])
-            resstr = ','.join([k, ','.join([str(sum(round_latencies[k][reason])/num_rounds) for reason in exit_reason_ordering])])
-            for r in sorted(round_latencies[k].keys()):
-                if r not in exit_reason_ordering:
-                    resstr = ','.join([resstr, r, str(sum(round_latencies[k][r])/num_rounds)])
-            print(resstr, file=ofile)
+            rounds = round_latencies[k]
+            num_rounds = sum('EPT_MISCONFIG' in sums for sums in rounds)
+            others = sorted({r for sums in rounds for r in sums}.difference(exit_reason_ordering))
+            # one row per round, one column per exit reason
+            totals = np.array([[sums.get(r, 0) for r in exit_reason_ordering + others] for sums in rounds], dtype=np.int64)
+            means = (totals.sum(axis=0) / num_rounds).tolist()
+            row = [k, *means[:len(exit_reason_ordering)]]
+            for r, mean in zip(others, means[len(exit_reason_ordering):]):
+                row.extend([r, mean])
+            writer.writerow(row)
@@ -1,19 +1,30 @@
-import sys
+import argparse
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib import style
-import seaborn as sb
 import numpy as np
 
-if len(sys.argv) != 3:
-    print('usage: python3 mlr.py DATAFILE TESTSIZE')
-    sys.exit(1)
-
-testsize = float(sys.argv[2])
-
-df = pd.read_csv(sys.argv[1])
+parser = argparse.ArgumentParser()
+parser.add_argument('datafile')
+parser.add_argument('testsize', type=float)
+parser.add_argument('--no-plot', dest='plot', action='store_false', help='if present only print the regression results')
+args = parser.parse_args()
+
+testsize = args.testsize
+
+def plot(yhat, ytest, path):
+    # matplotlib and seaborn are slow to import, so only load them for plots
+    import matplotlib.pyplot as plt
+    import seaborn as sb
+    sb.kdeplot(yhat, color = 'r', label = 'Predicted Values')
+    sb.kdeplot(ytest, color = 'b', label = 'Actual Values')
+    plt.title('Actual vs Predicted Values', fontsize = 16)
+    plt.xlabel('Values', fontsize = 12)
+    plt.ylabel('Frequency', fontsize = 12)
+    plt.legend(loc = 'upper left', fontsize = 13)
+    plt.savefig(path)
+
+df = pd.read_csv(args.datafile)
 df.describe()
 
 print('============== page faults + I/O + timer  =====================')
@@ -29,29 +40,19 @@ yhat = lr.predict(xtest)
 print('R-Squared: ', lr.score(xtest, ytest))
 print('Intercepts: ', lr.intercept_)
 
-sb.distplot(yhat, hist = False, color = 'r', label = 'Predicted Values')
-sb.distplot(ytest, hist = False, color = 'b', label = 'Actual Values')
-plt.title('Actual vs Predicted Values', fontsize = 16)
-plt.xlabel('Values', fontsize = 12)
-plt.ylabel('Frequency', fontsize = 12)
-plt.legend(loc = 'upper left', fontsize = 13)
-plt.savefig('ap.png')
+if args.plot:
+    plot(yhat, ytest, 'ap.png')
 
 print('============== page faults only =====================')
-xvar = df[['Increasement in EPT_VIOLATION exit time, us']]
-xtrain, xtest, ytrain, ytest = train_test_split(xvar, yvar, test_size = testsize, random_state = 0)
+# reuse the split above, keeping only the page fault column
+cols = ['Increasement in EPT_VIOLATION exit time, us']
 
 lr = LinearRegression()
-lr.fit(xtrain, ytrain)
-yhat = lr.predict(xtest)
+lr.fit(xtrain[cols], ytrain)
+yhat = lr.predict(xtest[cols])
 
-print('R-Squared: ', lr.score(xtest, ytest))
+print('R-Squared: ', lr.score(xtest[cols], ytest))
 print('Intercepts: ', lr.intercept_)
 
-sb.distplot(yhat, hist = False, color = 'r', label = 'Predicted Values')
-sb.distplot(ytest, hist = False, color = 'b', label = 'Actual Values')
-plt.title('Actual vs Predicted Values', fontsize = 16)
-plt.xlabel('Values', fontsize = 12)
-plt.ylabel('Frequency', fontsize = 12)
-plt.legend(loc = 'upper left', fontsize = 13)
-plt.savefig('ap1.png')
+if args.plot:
+    plot(yhat, ytest, 'ap1.png')
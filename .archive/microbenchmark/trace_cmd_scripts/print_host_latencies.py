@@ -3,11 +3,20 @@
 and print latencies spent in the host, i.e. between `kvm_entry` and `kvm_exit`
 """
 import argparse
+import mmap
+import os
+import re
 import sys
 import numpy as np
 from collections import defaultdict
 
-def parse_report(report,infile=None, kvmmmu=False, PAGE_SHIFT=12):
+# one event line of a report: `COMM-PID [CPU] SECS.USECS: EVENT: ...`
+EVENT_LINE = re.compile(rb'^[ \t]*\S+[ \t]+\S+[ \t]+(\d+)\.(\d+):[ \t]+(\S+)[^\n]*', re.M)
+
+def parse_report(report, kvmmmu=False, PAGE_SHIFT=12, skip_until=None):
+    """Parse the report at path `report`. If `skip_until` is given, events
+    up to and including the first line containing it are discarded.
+    """
     latencies = defaultdict(list)
     counts = defaultdict(int)
     max_lat = defaultdict(int)
@@ -47,34 +56,40 @@ def parse_report(report,infile=None, kvmmmu=False, PAGE_SHIFT=12):
         elif lat_us < min_lat[reason]:
             min_lat[reason] = lat_us
 
-    def readfile(infile):
-        linenum = 0
-        for line in infile:
-            linenum += 1
-            strs = line.strip().split()
-            if len(strs) > 3 and strs[3] == 'kvm_exit:':
-                try:
-                    reason = strs[5]
-                except IndexError:
-                    print(line)
-                    raise IndexError
-                start_s, start_us = [int(x) for x in strs[2][:-1].split('.')]
-                lines = []
-                for line in infile:
-                    linenum += 1
-                    strs = line.strip().split()
-                    end_s, end_us = [int(x) for x in strs[2][:-1].split('.')]
-                    if strs[3] == 'kvm_entry:':
-                        classify_latency(reason, lines, (end_s - start_s) * 1000000 + end_us - start_us)
-                        break
-                    else:
-                        lines.append(line)
-
-    if infile is None:
-        with open(report) as infile:
-            readfile(infile)
-    else:
-        readfile(infile)
+    def readfile(mm, pos):
+        # the report is scanned in place; only lines between a kvm_exit and
+        # its kvm_entry are decoded, for classify_latency
+        reason = None
+        for m in EVENT_LINE.finditer(mm, pos):
+            event = m.group(3)
+            if reason is None:
+                if event == b'kvm_exit:':
+                    try:
+                        reason = m.group(0).split()[5].decode()
+                    except IndexError:
+                        print(m.group(0).decode())
+                        raise IndexError
+                    start_s, start_us = int(m.group(1)), int(m.group(2))
+                    lines = []
+            elif event == b'kvm_entry:':
+                end_s, end_us = int(m.group(1)), int(m.group(2))
+                classify_latency(reason, lines, (end_s - start_s) * 1000000 + end_us - start_us)
+                reason = None
+            else:
+                lines.append(m.group(0).decode())
+
+    with open(report, 'rb') as infile:
+        # mmap cannot map an empty file
+        if os.fstat(infile.fileno()).st_size:
+            with mmap.mmap(infile.fileno(), 0, prot=mmap.PROT_READ) as mm:
+                pos = 0
+                if skip_until is not None:
+                    pos = mm.find(skip_until)
+                    if pos >= 0:
+                        pos = mm.find(b'\n', pos)
+                    # nothing follows a missing or last line
+                    pos = len(mm) if pos < 0 else pos + 1
+                readfile(mm, pos)
 
     return latencies, counts, max_lat, min_lat, ept_violation_latencies, gfn_latencies, mmios
 
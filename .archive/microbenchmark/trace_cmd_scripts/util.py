@@ -0,0 +1,8 @@
+from functools import lru_cache
+
+# the same app names are sorted once per style
+@lru_cache(maxsize=None)
+def sortAppName(appname):
+    # language suffix first, then the rest of the name
+    name, _, lang = appname.rpartition('-')
+    return lang + name
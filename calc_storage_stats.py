@@ -1,38 +1,27 @@
 #!/usr/bin/env python
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import json
-import statistics
+import numpy as np
 
-d = Path('storage-stats/lsroot')
-lsroot = []
-for statfile in d.iterdir():
-    with open(statfile) as f:
-        lsroot.append(json.loads(f.readline()))
+try:
+    import orjson as json
+except ImportError:
+    import json
 
-d = Path('storage-stats/createuserfile')
-createuserfile = []
-for statfile in d.iterdir():
-    with open(statfile) as f:
-        createuserfile.append(json.loads(f.readline()))
+def load_one(statfile):
+    with open(statfile, 'rb') as f:
+        return json.loads(f.readline())
 
-d = Path('storage-stats/writeuserfile')
-writeuserfile = []
-for statfile in d.iterdir():
-    with open(statfile) as f:
-        writeuserfile.append(json.loads(f.readline()))
+def load_dir(d):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return list(pool.map(load_one, Path(d).iterdir()))
 
-d = Path('storage-stats/readuserfile')
-readuserfile = []
-for statfile in d.iterdir():
-    with open(statfile) as f:
-        readuserfile.append(json.loads(f.readline()))
-
-d = Path('storage-stats/deleteuserfile')
-deleteuserfile = []
-for statfile in d.iterdir():
-    with open(statfile) as f:
-        deleteuserfile.append(json.loads(f.readline()))
+lsroot = load_dir('storage-stats/lsroot')
+createuserfile = load_dir('storage-stats/createuserfile')
+writeuserfile = load_dir('storage-stats/writeuserfile')
+readuserfile = load_dir('storage-stats/readuserfile')
+deleteuserfile = load_dir('storage-stats/deleteuserfile')
 
 print('lines:')
 print(len(lsroot))
@@ -40,50 +29,21 @@ print(len(createuserfile))
 print(len(writeuserfile))
 print(len(readuserfile))
 print(len(deleteuserfile))
-total_num = len(lsroot)
-
-print("Average elapsed (nanos)")
-print('lsroot')
-elapses = []
-for stat in lsroot:
-    nanos = stat['elapsed']['secs'] * (10^6) + stat['elapsed']['nanos']
-    elapses.append(nanos)
-print(sum(elapses)/total_num)
-quantiles = statistics.quantiles(elapses)
-print(quantiles)
 
-print('createuserfile')
-elapses = []
-for stat in createuserfile:
-    nanos = stat['elapsed']['secs'] * (10^6) + stat['elapsed']['nanos']
-    elapses.append(nanos)
-print(sum(elapses)/total_num)
-quantiles = statistics.quantiles(elapses)
-print(quantiles)
+def elapsed_nanos(stats):
+    secs = np.fromiter((s['elapsed']['secs'] for s in stats), dtype=np.int64, count=len(stats))
+    nanos = np.fromiter((s['elapsed']['nanos'] for s in stats), dtype=np.int64, count=len(stats))
+    return secs * 1_000_000_000 + nanos
 
-print('writeuserfile')
-elapses = []
-for stat in writeuserfile:
-    nanos = stat['elapsed']['secs'] * (10^6) + stat['elapsed']['nanos']
-    elapses.append(nanos)
-print(sum(elapses)/total_num)
-quantiles = statistics.quantiles(elapses)
-print(quantiles)
-
-print('readuserfile')
-elapses = []
-for stat in readuserfile:
-    nanos = stat['elapsed']['secs'] * (10^6) + stat['elapsed']['nanos']
-    elapses.append(nanos)
-print(sum(elapses)/total_num)
-quantiles = statistics.quantiles(elapses)
-print(quantiles)
-
-print('deleteuserfile')
-elapses = []
-for stat in deleteuserfile:
-    nanos = stat['elapsed']['secs'] * (10^6) + stat['elapsed']['nanos']
-    elapses.append(nanos)
-print(sum(elapses)/total_num)
-quantiles = statistics.quantiles(elapses)
-print(quantiles)
+print("Average elapsed (nanos)")
+for name, stats in [('lsroot', lsroot),
+                    ('createuserfile', createuserfile),
+                    ('writeuserfile', writeuserfile),
+                    ('readuserfile', readuserfile),
+                    ('deleteuserfile', deleteuserfile)]:
+    print(name)
+    elapses = elapsed_nanos(stats)
+    print(elapses.mean())
+    # 'weibull' matches the default (exclusive) method of statistics.quantiles
+    quantiles = np.percentile(elapses, [25, 50, 75], method='weibull')
+    print(quantiles.tolist())
@@ -1,239 +1,338 @@
-import time
-import json
-import base64
+try:
+    import orjson as json
+except ImportError:
+    import json
+from base64 import b64encode, b64decode
 from contextlib import ExitStack
 
-from syscalls import ResponseDict
+from syscalls import File, Response, ResponseDict, ResponseRaw
 
-def handle(syscall, payload=b'', blobs={}, **kwargs):
-    request = json.loads(payload)
-    args = request['args']
-    op = request['op']
+# parsed labels by label string. Parsing is a pure function of the string,
+# so results are shared across invocations; bounded since labels come
+# from invokers.
+_labels = {}
+_LABELS_MAX = 256
+
+def _buckle_parse(syscall, s):
+    label = _labels.get(s)
+    if label is None:
+        label = syscall.buckle_parse(s)
+        if len(_labels) >= _LABELS_MAX:
+            _labels.clear()
+        _labels[s] = label
+    return label
+
+def _ping(syscall, args, blobs):
+    ret = {}
+    ret["success"] = True
+    ret["value"] = "pong"
+    return ret
+
+def _mkdir(syscall, args, blobs):
+    ret = {}
+    ret["success"] = False
+    with syscall.root().open_at(args["base"]) as dir:
+        label = _buckle_parse(syscall, args["label"])
+        res = syscall.dent_create_dir(label)
+        if res is not None:
+            newfd = res.fd
+            res2 = syscall.link(dir.fd, res.fd, args["name"])
+            if res2 is not None:
+                ret["success"] = res2.success
+                ret["value"] = res.fd
+    return ret
+
+# ls results of the current invocation, keyed by path. Never kept across
+# invocations: listing taints the instance's label, and a cached listing
+# would let a later invocation observe it without being tainted.
+_ls_cache = {}
+
+def _ls(syscall, args, blobs):
+    ret = {}
+    ret["success"] = False
+    key = tuple(args["path"])
+    res = _ls_cache.get(key)
+    if res is None:
+        with syscall.root().open_at(args["path"]) as dir:
+            res = dir.ls()
+            if res is not None:
+                _ls_cache[key] = res
+    if res is not None:
+        ret["success"] = True
+        ret["value"] = res
+    return ret
+
+def _unlink(syscall, args, blobs):
+    ret = {}
+    ret["success"] = False
+    with syscall.root().open_at(args["base"]) as dir:
+        res = dir.unlink(args["name"])
+        if res is not None:
+            ret["success"] = res.success
+            ret["value"] = res.fd
+    return ret
+
+def _mkfile(syscall, args, blobs):
+    ret = {}
+    ret["success"] = False
+    with syscall.root().open_at(args["base"]) as dir:
+        label = _buckle_parse(syscall, args["label"])
+        res = syscall.dent_create_file(label)
+        if res is not None:
+            newfd = res.fd
+            # optional initial contents, written through the new fd instead of
+            # a follow-up write op that reopens the file by path
+            if "data" in args and not File(newfd, syscall).write(b64decode(args["data"])):
+                return ret
+            res2 = syscall.link(dir.fd, newfd, args["name"])
+            if res2 is not None:
+                ret["success"] = res2.success
+                ret["value"] = res.fd
+    return ret
+
+def _write(syscall, args, blobs):
     ret = {}
-    match op:
-        case "ping":
+    ret["success"] = False
+    with syscall.root().open_at(args["path"]) as file:
+        res = file.write(b64decode(args["data"]))
+        ret["success"] = res
+    return ret
+
+def _read(syscall, args, blobs):
+    ret = {}
+    ret["success"] = False
+    with syscall.root().open_at(args["path"]) as file:
+        res = file.read()
+        # callers that can take the file bytes as the response body skip the
+        # base64 round trip
+        if res is not None and args.get("raw"):
+            return ResponseRaw(res)
+        if res is not None:
             ret["success"] = True
-            ret["value"] = "pong"
-        case "mkdir":
-            ret["success"] = False
-            print("1")
-            with syscall.root().open_at(args["base"]) as dir:
-                print("2")
-                label = syscall.buckle_parse(args["label"])
-                res = syscall.dent_create_dir(label)
-                print("3")
-                if res is not None:
-                    print("4")
-                    newfd = res.fd
-                    res2 = syscall.link(dir.fd, res.fd, args["name"])
-                    if res2 is not None:
-                        print("5")
-                        ret["success"] = res2.success
-                        ret["value"] = res.fd
-        case "ls":
-            ret["success"] = False
-            print(args["path"])
-            with syscall.root().open_at(args["path"]) as dir:
-                res = dir.ls()
-                if res is not None:
-                    ret["success"] = True
-                    ret["value"] = res
-        case "unlink":
+            ret["value"] = b64encode(res).decode()
+        else:
             ret["success"] = False
-            with syscall.root().open_at(args["base"]) as dir:
-                res = dir.unlink(args["name"])
-                if res is not None:
-                    ret["success"] = res.success
-                    ret["value"] = res.fd
-        case "mkfile":
-            ret["success"] = False
-            with syscall.root().open_at(args["base"]) as dir:
-                label = syscall.buckle_parse(args["label"])
-                res = syscall.dent_create_file(label)
-                if res is not None:
-                    newfd = res.fd
-                    res2 = syscall.link(dir.fd, newfd, args["name"])
-                    if res2 is not None:
-                        ret["success"] = res2.success
-                        ret["value"] = res.fd
-        case "write":
-            ret["success"] = False
-            with syscall.root().open_at(args["path"]) as file:
-                res = file.write(base64.b64decode(args["data"]))
-                ret["success"] = res
-        case "read":
-            ret["success"] = False
-            with syscall.root().open_at(args["path"]) as file:
-                res = file.read()
-                if res is not None:
-                    ret["success"] = True
-                    ret["value"] = base64.b64encode(res).decode()
-                else:
-                    ret["success"] = False
-        case "mkgate":
-            with ExitStack() as stack:
-                dir = stack.enter_context(syscall.root().open_at(args["base"]))
-                label = syscall.buckle_parse(args["label"])
-                priv = syscall.buckle_parse(args["privilege"] + ",T").secrecy
-                clearance = syscall.buckle_parse(args["clearance"] + ",T").secrecy
-                res = None
-                print(label, blobs)
-                if "memory" in args:
-                    memory = args["memory"]
-                    app_image = None
-                    runtime = None
-                    kernel = None
-                    if blobs.get("app_image"):
-                        app_image = syscall.dent_create_blob(label, blobs["app_image"])
-                    else:
-                        app_image = stack.enter_context(syscall.root().open_at(args["app_image"]))
-
-                    if blobs.get("runtime"):
-                        runtime = syscall.dent_create_blob(label, blobs["runtime"])
-                    else:
-                        runtime = stack.enter_context(syscall.root().open_at(args["runtime"]))
-
-                    if blobs.get("kernel"):
-                        kernel = syscall.dent_create_blob(label, blobs["kernel"])
-                    else:
-                        kernel = stack.enter_context(syscall.root().open_at(args["kernel"]))
-
-                    res = syscall.dent_create_direct_gate(
-                        label,
-                        priv,
-                        clearance,
-                        memory,
-                        app_image,
-                        runtime,
-                        kernel)
-                else:
-                    gate = stack.enter_context(syscall.root().open_at(args["gate"]))
-                    res = syscall.dent_create_redirect_gate(
-                        label,
-                        priv,
-                        clearance,
-                        gate)
-                if res is not None:
-                    newfd = res.fd
-                    print(res)
-                    res2 = dir.link(res, args["name"])
-                    if res2 is not None:
-                        ret["success"] = res2.success
-                        ret["value"] = res.fd
-        case "upgate":
-            ret["success"] = False
-            label = syscall.buckle_parse("T,T")
-            priv = args.get("privilege") and syscall.buckle_parse(args.get("privilege") + ",T").secrecy
-            clearance = args.get("clearance") and syscall.buckle_parse(args.get("clearance") + ",T").secrecy
-            memory = args.get("memory")
-            gate = args.get("gate")
-            with ExitStack() as stack:
-                target_gate = stack.enter_context(syscall.root().open_at(args["path"]))
-                if memory:
-                    app_image = None
-                    runtime = None
-                    kernel = None
-                    if blobs.get("app_image"):
-                        app_image = syscall.dent_create_blob(label, blobs["app_image"])
-                    elif args.get("app_image"):
-                        app_image = stack.enter_context(syscall.root().open_at(args["app_image"]))
-
-                    if blobs.get("runtime"):
-                        runtime = syscall.dent_create_blob(label, blobs["runtime"])
-                    elif args.get("runtime"):
-                        runtime = stack.enter_context(syscall.root().open_at(args["runtime"]))
-
-                    if blobs.get("kernel"):
-                        kernel = syscall.dent_create_blob(label, blobs["kernel"])
-                    elif args.get("kernel"):
-                        kernel = stack.enter_context(syscall.root().open_at(args["kernel"]))
-
-                    res = target_gate.update_direct(privilege = priv, invoker_clearance = clearance, memory = memory, app_image=app_image, kernel=kernel, runtime=runtime)
-                    ret["success"] = res.success
-                elif gate:
-                    gate = stack.enter_context(syscall.root().open_at(args["gate"]))
-                    res = target_gate.update_redirect(privilege = priv, invoker_clearance = clearance, gate = gate)
-                    ret["success"] = res.success
-                else:
-                    ret["success"] = False
-                    ret["error"] = "You must pass supply either `memory` or `gate`"
-        case "mkblob":
-            ret["success"] = False
-            base = args["base"]
-            label = args["label"]
-            label = syscall.buckle_parse(args["label"])
-            ret["fds"] = []
-            with syscall.root().open_at(base) as dir:
-                for (name, blob) in blobs.items():
-                    res = syscall.dent_create_blob(label, blob)
-                    if res is not None:
-                        newfd = res.fd
-                        res2 = syscall.link(dir.fd, newfd, name)
-                        if res2 is not None:
-                            ret["success"] = res2.success
-                            list.append(ret["fds"], res.fd)
-        case "cat":
-            with syscall.root().open_at(args["path"]) as blobfd:
-                with blobfd.get() as blob:
-                    contents = blob.read()
-                    return contents
-        case "mkfaceted":
+    return ret
+
+def _mkgate(syscall, args, blobs):
+    ret = {}
+    with ExitStack() as stack:
+        dir = stack.enter_context(syscall.root().open_at(args["base"]))
+        label = _buckle_parse(syscall, args["label"])
+        priv = _buckle_parse(syscall, args["privilege"] + ",T").secrecy
+        clearance = _buckle_parse(syscall, args["clearance"] + ",T").secrecy
+        res = None
+        if "memory" in args:
+            memory = args["memory"]
+            app_image = None
+            runtime = None
+            kernel = None
+            if blobs.get("app_image"):
+                app_image = syscall.dent_create_blob(label, blobs["app_image"])
+            else:
+                app_image = stack.enter_context(syscall.root().open_at(args["app_image"]))
+
+            if blobs.get("runtime"):
+                runtime = syscall.dent_create_blob(label, blobs["runtime"])
+            else:
+                runtime = stack.enter_context(syscall.root().open_at(args["runtime"]))
+
+            if blobs.get("kernel"):
+                kernel = syscall.dent_create_blob(label, blobs["kernel"])
+            else:
+                kernel = stack.enter_context(syscall.root().open_at(args["kernel"]))
+
+            res = syscall.dent_create_direct_gate(
+                label,
+                priv,
+                clearance,
+                memory,
+                app_image,
+                runtime,
+                kernel)
+        else:
+            gate = stack.enter_context(syscall.root().open_at(args["gate"]))
+            res = syscall.dent_create_redirect_gate(
+                label,
+                priv,
+                clearance,
+                gate)
+        if res is not None:
+            newfd = res.fd
+            res2 = dir.link(res, args["name"])
+            if res2 is not None:
+                ret["success"] = res2.success
+                ret["value"] = res.fd
+    return ret
+
+def _upgate(syscall, args, blobs):
+    ret = {}
+    ret["success"] = False
+    label = _buckle_parse(syscall, "T,T")
+    priv = args.get("privilege") and _buckle_parse(syscall, args.get("privilege") + ",T").secrecy
+    clearance = args.get("clearance") and _buckle_parse(syscall, args.get("clearance") + ",T").secrecy
+    memory = args.get("memory")
+    gate = args.get("gate")
+    with ExitStack() as stack:
+        target_gate = stack.enter_context(syscall.root().open_at(args["path"]))
+        if memory:
+            app_image = None
+            runtime = None
+            kernel = None
+            if blobs.get("app_image"):
+                app_image = syscall.dent_create_blob(label, blobs["app_image"])
+            elif args.get("app_image"):
+                app_image = stack.enter_context(syscall.root().open_at(args["app_image"]))
+
+            if blobs.get("runtime"):
+                runtime = syscall.dent_create_blob(label, blobs["runtime"])
+            elif args.get("runtime"):
+                runtime = stack.enter_context(syscall.root().open_at(args["runtime"]))
+
+            if blobs.get("kernel"):
+                kernel = syscall.dent_create_blob(label, blobs["kernel"])
+            elif args.get("kernel"):
+                kernel = stack.enter_context(syscall.root().open_at(args["kernel"]))
+
+            res = target_gate.update_direct(privilege = priv, invoker_clearance = clearance, memory = memory, app_image=app_image, kernel=kernel, runtime=runtime)
+            ret["success"] = res.success
+        elif gate:
+            gate = stack.enter_context(syscall.root().open_at(args["gate"]))
+            res = target_gate.update_redirect(privilege = priv, invoker_clearance = clearance, gate = gate)
+            ret["success"] = res.success
+        else:
             ret["success"] = False
-            with syscall.root().open_at(args["base"]) as dir:
-                ret["value"] = args["base"]
-                res = syscall.dent_create_faceted()
-                if res is not None:
-                    newfd = res.fd
-                    res2 = syscall.link(dir.fd, newfd, args["name"])
-                    if res2 is not None:
-                        ret["success"] = res2.success
-                        ret["value"] = res.fd
-        case 'mksvc':
-            label = syscall.buckle_parse(args["label"])
-            priv = syscall.buckle_parse(args["privilege"] + ",T").secrecy
-            clearance = syscall.buckle_parse(args["clearance"] + ",T").secrecy
-            taint = syscall.buckle_parse(args["taint"] + ",T")
-            url     = args['url']
-            verb    = args['verb']
-            headers = args['headers']
+            ret["error"] = "You must pass supply either `memory` or `gate`"
+    return ret
+
+def _mkblob(syscall, args, blobs):
+    ret = {}
+    ret["success"] = False
+    base = args["base"]
+    label = args["label"]
+    label = _buckle_parse(syscall, args["label"])
+    fds = []
+    ret["fds"] = fds
+    with syscall.root().open_at(base) as dir:
+        for (name, blob) in blobs.items():
+            res = syscall.dent_create_blob(label, blob)
+            if res is not None:
+                newfd = res.fd
+                res2 = syscall.link(dir.fd, newfd, name)
+                if res2 is not None:
+                    ret["success"] = res2.success
+                    fds.append(res.fd)
+    return ret
+
+def _cat(syscall, args, blobs):
+    with syscall.root().open_at(args["path"]) as blobfd:
+        with blobfd.get() as blob:
+            contents = blob.read()
+            return ResponseRaw(contents)
+
+def _mkfaceted(syscall, args, blobs):
+    ret = {}
+    ret["success"] = False
+    with syscall.root().open_at(args["base"]) as dir:
+        ret["value"] = args["base"]
+        res = syscall.dent_create_faceted()
+        if res is not None:
+            newfd = res.fd
+            res2 = syscall.link(dir.fd, newfd, args["name"])
+            if res2 is not None:
+                ret["success"] = res2.success
+                ret["value"] = res.fd
+    return ret
+
+def _mksvc(syscall, args, blobs):
+    ret = {}
+    label = _buckle_parse(syscall, args["label"])
+    priv = _buckle_parse(syscall, args["privilege"] + ",T").secrecy
+    clearance = _buckle_parse(syscall, args["clearance"] + ",T").secrecy
+    taint = _buckle_parse(syscall, args["taint"] + ",T")
+    url     = args['url']
+    verb    = args['verb']
+    headers = args['headers']
+
+    ret["success"] = False
+    with syscall.root().open_at(args["base"]) as dir:
+        ret["value"] = args["base"]
+        res = syscall.dent_create_service(label, priv, clearance, taint, url, verb, headers)
+        if res is not None:
+            newfd = res.fd
+            res2 = syscall.link(dir.fd, newfd, args["name"])
+            if res2 is not None:
+                ret["success"] = res2.success
+                ret["value"] = res.fd
+    return ret
 
+def _invoke(syscall, args, blobs):
+    ret = {}
+    path = args["path"]
+    sync = args["sync"]
+    payload = b64decode(args["payload"])
+    params = args["params"]
+    with syscall.root().open_at(args["path"]) as invokable:
+        result = invokable.invoke(payload=payload, sync=sync, params=params)
+        if result:
+            ret["success"] = result.success
+            ret["fd"] = result.fd
+            ret["data"] = b64encode(result.data).decode("utf-8")
+        else:
             ret["success"] = False
-            with syscall.root().open_at(args["base"]) as dir:
-                ret["value"] = args["base"]
-                res = syscall.dent_create_service(label, priv, clearance, taint, url, verb, headers)
-                if res is not None:
-                    newfd = res.fd
-                    res2 = syscall.link(dir.fd, newfd, args["name"])
-                    if res2 is not None:
-                        ret["success"] = res2.success
-                        ret["value"] = res.fd
-        case 'invoke':
-            path = args["path"]
-            sync = args["sync"]
-            payload = base64.b64decode(args["payload"])
-            params = args["params"]
-            with syscall.root().open_at(args["path"]) as invokable:
-                result = invokable.invoke(payload=payload, sync=sync, params=params)
-                if result:
-                    ret["success"] = result.success
-                    ret["fd"] = result.fd
-                    ret["data"] = base64.b64encode(result.data).decode("utf-8")
-                else:
-                    ret["success"] = False
-        case _:
-            ret['success'] = False
-            ret['error'] = '[fsutil] unknown op'
-    return ResponseDict(ret)
+    return ret
+
+# constant error results, shared between requests and never mutated
+_UNKNOWN_OP = {'success': False, 'error': '[fsutil] unknown op'}
+_NOT_BATCHABLE = {'success': False, 'error': '[fsutil] op cannot be batched'}
+
+def _unknown(syscall, args, blobs):
+    return _UNKNOWN_OP
+
+# op name -> handler, looked up once per request
+_OPS = {
+    "ping": _ping,
+    "mkdir": _mkdir,
+    "ls": _ls,
+    "unlink": _unlink,
+    "mkfile": _mkfile,
+    "write": _write,
+    "read": _read,
+    "mkgate": _mkgate,
+    "upgate": _upgate,
+    "mkblob": _mkblob,
+    "cat": _cat,
+    "mkfaceted": _mkfaceted,
+    "mksvc": _mksvc,
+    "invoke": _invoke,
+}
 
-#def trigger(triggers, syscall, op, path):
-#    ret = {'success': [], 'failure': []}
-#    for gate in triggers:
-#        payload = {
-#            'source-op': op,
-#            'object-path': path,
-#        }
-#        if syscall.invoke(gate, json.dumps(payload)):
-#            ret['success'].append(gate)
-#        else:
-#            ret['failure'].append(gate)
-#    return ret
+# ops that cannot change a directory listing
+_LS_PRESERVING_OPS = {"ping", "ls", "read", "write", "cat"}
+
+def _batch(syscall, ops, blobs):
+    ret = []
+    for request in ops:
+        op = request['op']
+        res = _OPS.get(op, _unknown)(syscall, request['args'], blobs)
+        if op not in _LS_PRESERVING_OPS:
+            _ls_cache.clear()
+        # raw responses (cat, raw read) cannot be embedded in a batch result
+        if isinstance(res, Response):
+            res = _NOT_BATCHABLE
+        ret.append(res)
+    return ret
+
+def handle(syscall, payload=b'', blobs={}, **kwargs):
+    request = json.loads(payload)
+    _ls_cache.clear()
+    # a request is either a single {op, args} or {ops: [{op, args}, ...]},
+    # the latter answered with a list of per-op results in one invocation
+    if 'ops' in request:
+        return ResponseDict(_batch(syscall, request['ops'], blobs))
+    args = request['args']
+    op = request['op']
+    ret = _OPS.get(op, _unknown)(syscall, args, blobs)
+    if isinstance(ret, Response):
+        return ret
+    return ResponseDict(ret)
@@ -1,31 +1,66 @@
 from syscalls import ResponseStr
-import json
+try:
+    import orjson as json
+except ImportError:
+    import json
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
-import jwt
-import datetime
+from jwt.algorithms import ECAlgorithm
+from jwt.utils import base64url_encode
+import time
 
 PEM_FILE=['home', 'faasten,faasten', 'private_key']
-def handle(syscall, payload=b'', blobs={}, invoker=[], **kwargs):
-    request = json.loads(payload)
-    sub = request['sub']
-    # the invoker should be of length 1 and the tokens list should also be of length 1
-    idp = invoker[0].tokens[0]
+# tokens expire after one day, in seconds
+TOKEN_LIFETIME = 24 * 60 * 60
+
+# parsed private keys by PEM contents. The PEM file is still read on every
+# invocation, since reading it is what taints the instance's label with the
+# key's secrecy; only parsing it is skipped on warm invocations.
+_private_keys = {}
+
+def private_key(syscall):
     # read private key PEM file
     with syscall.root().open_at(PEM_FILE) as f:
         data = f.read()
-        private_key = serialization.load_pem_private_key(
+    key = _private_keys.get(data)
+    if key is None:
+        key = serialization.load_pem_private_key(
             data,
             password=None,  # replace with your password if the private key is encrypted
             backend=default_backend()
         )
+        # only the current key is worth keeping
+        _private_keys.clear()
+        _private_keys[data] = key
+    return key
+
+# the signing algorithm and the JWT header are the same for every token, so
+# resolve the algorithm and encode the header once instead of per jwt.encode
+_ES256 = ECAlgorithm(ECAlgorithm.SHA256)
+_HEADER_SEGMENT = base64url_encode(b'{"alg":"ES256","typ":"JWT"}')
+
+def encode_jwt(claims, key):
+    """Equivalent to jwt.encode(claims, key, algorithm='ES256')"""
+    payload = json.dumps(claims)
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    signing_input = _HEADER_SEGMENT + b'.' + base64url_encode(payload)
+    signature = _ES256.sign(signing_input, key)
+    return (signing_input + b'.' + base64url_encode(signature)).decode('utf-8')
+
+def handle(syscall, payload=b'', blobs={}, invoker=[], **kwargs):
+    request = json.loads(payload)
+    sub = request['sub']
+    # the invoker should be of length 1 and the tokens list should also be of length 1
+    idp = invoker[0].tokens[0]
+    now = int(time.time())
     claims = {
         "sub": f"{idp}/{sub}",          # subject (typically a user id)
-        "iat": datetime.datetime.utcnow(),             # issued at
-        "exp": datetime.datetime.utcnow() + datetime.timedelta(days=1),  # expiration time
+        "iat": now,                     # issued at
+        "exp": now + TOKEN_LIFETIME,    # expiration time
     }
-    encoded_jwt = jwt.encode(claims, private_key, algorithm='ES256')
+    encoded_jwt = encode_jwt(claims, private_key(syscall))
 
     # TODO: declassify to remove "faasten" in secrecy
     # syscall.declassify(f"{idp}")
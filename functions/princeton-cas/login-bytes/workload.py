@@ -1,9 +1,10 @@
 from syscalls import ResponseRaw
 BASE_URL = "sns40.cs.princeton.edu"
+REDIRECT_URL = "https://fed.princeton.edu/cas"
+# TODO replace the URL to the path to the auth gate
+CALLBACK_URL = f"{BASE_URL}/authenticate/cas"
+# the response never changes, so it is encoded once at import
+BODY = f"{REDIRECT_URL}/login?service={CALLBACK_URL}".encode('utf-8')
+STATUS_CODE = 302
 def handle(syscall, payload=b'', blobs={}, **kwargs):
-    redirect_url = "https://fed.princeton.edu/cas"
-    # TODO replace the URL to the path to the auth gate
-    callback_url = f"{BASE_URL}/authenticate/cas"
-    body = f"{redirect_url}/login?service={callback_url}"
-    status_code = 302
-    return ResponseRaw(body.encode('utf-8'), status_code)
+    return ResponseRaw(BODY, STATUS_CODE)
@@ -0,0 +1,74 @@
+"""Checks that the jwt function's key cache does not change the label an
+invocation ends with. Run with `python3 -m unittest` from this directory."""
+import importlib.util
+import json
+import os
+import sys
+import types
+import unittest
+from contextlib import contextmanager
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+WORKLOAD = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'jwt', 'workload.py')
+
+# the function only needs ResponseStr from the runtime's syscalls module,
+# which cannot be imported without the generated protobuf bindings
+if 'syscalls' not in sys.modules:
+    syscalls = types.ModuleType('syscalls')
+    class ResponseStr():
+        def __init__(self, val, code=200):
+            self._val = val
+            self._code = code
+    syscalls.ResponseStr = ResponseStr
+    sys.modules['syscalls'] = syscalls
+
+PEM = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+    serialization.Encoding.PEM,
+    serialization.PrivateFormat.PKCS8,
+    serialization.NoEncryption())
+
+class FakeSyscall():
+    """One invocation's view of the host: the label starts out empty, as in
+    a new SyscallProcessor, and reading a file taints it with the secrecy of
+    every directory on the path and of the file itself."""
+    def __init__(self):
+        self.label = set()
+
+    def root(self):
+        return self
+
+    @contextmanager
+    def open_at(self, path):
+        self.label.update(path[1:2])
+        yield self
+
+    def read(self):
+        self.label.add('private_key')
+        return PEM
+
+class Invoker():
+    tokens = ['idp']
+
+def load_workload():
+    spec = importlib.util.spec_from_file_location('jwt_workload', WORKLOAD)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def invoke(workload):
+    syscall = FakeSyscall()
+    workload.handle(syscall, payload=json.dumps({'sub': 'alice'}), invoker=[Invoker()])
+    return syscall.label
+
+class WarmInvocationLabel(unittest.TestCase):
+    def test_warm_label_matches_cold(self):
+        workload = load_workload()
+        cold = invoke(workload)
+        self.assertTrue(cold)
+        warm = invoke(workload)
+        self.assertEqual(warm, cold)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,22 +3,25 @@ import syscalls_pb2
 import socket
 import struct
 import json
+# not part of the runtime image; used when a function package ships it
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from google.protobuf.json_format import MessageToJson, _Printer
 from contextlib import contextmanager
 
 HttpVerb = syscalls_pb2.HttpVerb
 
-### helper functions ###
-def recvall(sock, n):
-    # Helper function to recv n bytes or return None if EOF is hit
-    data = bytearray()
-    while len(data) < n:
-        packet = sock.recv(n - len(data))
-        if not packet:
-            return None
-        data.extend(packet)
-    return bytes(data)
+# big-endian length prefix of every message on the socket
+_LEN = struct.Struct(">I")
+# initial size of the receive buffer, which grows to fit larger messages.
+# Large enough that a whole blob block or file reply fits in the first recv.
+_RECV_BUF_SIZE = 64 * 1024
+# messages at least this large are sent without copying them behind the prefix
+_SENDMSG_MIN = 64 * 1024
 
+### helper functions ###
 def split_path(path):
     if not path:
         return [], '', False
@@ -54,6 +57,8 @@ class ResponseDict(Response):
         self._val = val
         self._code = code
     def body_to_bytes(self):
+        if orjson is not None:
+            return orjson.dumps(self._val, option=orjson.OPT_NON_STR_KEYS)
         return json.dumps(self._val).encode('utf-8')
     def status_code(self):
         return self._code
@@ -87,9 +92,9 @@ class DirEntry():
 
 class Directory(DirEntry):
     def ls(self):
-        req = syscalls_pb2.Syscall(dentList = self.fd)
-        self.syscall._send(req)
-        res = self.syscall._recv(syscalls_pb2.DentListResult())
+        req = self.syscall._request()
+        req.dentList = self.fd
+        res = self.syscall._call(req, syscalls_pb2.DentListResult())
         if res is not None:
             return dict(res.entries)
         else:
@@ -99,9 +104,10 @@ class Directory(DirEntry):
         return self.syscall.link(self.fd, target.fd, name)
 
     def unlink(self, name: str):
-        req = syscalls_pb2.Syscall(dentUnlink=syscalls_pb2.DentUnlink(fd=self.fd,name=name))
-        self.syscall._send(req)
-        return self.syscall._recv(syscalls_pb2.DentResult())
+        req = self.syscall._request()
+        req.dentUnlink.fd = self.fd
+        req.dentUnlink.name = name
+        return self.syscall._call(req, syscalls_pb2.DentResult())
 
 
     @contextmanager
@@ -129,31 +135,31 @@ class Directory(DirEntry):
                 yield BlobEntry(cur_dent, self.syscall)
             case _:
                 yield DirEntry(cur_dent, self.syscall)
-        req = syscalls_pb2.Syscall(dentClose=cur_dent)
-        self.syscall._send(req)
-        self.syscall._recv(syscalls_pb2.DentResult())
+        req = self.syscall._request()
+        req.dentClose = cur_dent
+        self.syscall._call(req, syscalls_pb2.DentResult())
 
 class File(DirEntry):
     def read(self):
-        req = syscalls_pb2.Syscall(dentRead=self.fd)
-        self.syscall._send(req)
-        response = self.syscall._recv(syscalls_pb2.DentResult())
+        req = self.syscall._request()
+        req.dentRead = self.fd
+        response = self.syscall._call(req, syscalls_pb2.DentResult())
         if response.success:
             return response.data
         else:
             return None
 
     def write(self, data):
-        req = syscalls_pb2.Syscall(dentUpdate=syscalls_pb2.DentUpdate(fd=self.fd, file=data))
-        self.syscall._send(req)
-        response = self.syscall._recv(syscalls_pb2.DentResult())
+        req = self.syscall._request()
+        req.dentUpdate.fd = self.fd
+        req.dentUpdate.file = data
+        response = self.syscall._call(req, syscalls_pb2.DentResult())
         return response.success
 
 class FacetedDirectory(DirEntry):
     def ls(self):
         req = syscalls_pb2.Syscall(dentLsFaceted = syscalls_pb2.DentLsFaceted(fd = self.fd))
-        self.syscall._send(req)
-        res = self.syscall._recv(syscalls_pb2.DentLsFacetedResult())
+        res = self.syscall._call(req, syscalls_pb2.DentLsFacetedResult())
         if res is not None:
             return list(map(_Printer()._MessageToJsonObject, res.facets))
         else:
@@ -162,9 +168,9 @@ class FacetedDirectory(DirEntry):
 class BlobEntry(DirEntry):
     @contextmanager
     def get(self):
-        req = syscalls_pb2.Syscall(dentGetBlob=self.fd)
-        self.syscall._send(req)
-        response = self.syscall._recv(syscalls_pb2.BlobResult())
+        req = self.syscall._request()
+        req.dentGetBlob = self.fd
+        response = self.syscall._call(req, syscalls_pb2.BlobResult())
         if response.success:
             yield Blob(response.fd, response.len, self.syscall)
         else:
@@ -173,14 +179,13 @@ class BlobEntry(DirEntry):
 class Gate(DirEntry):
     def invoke(self, payload: bytes = b"", sync: bool = True, params: dict[str,str] = {}, toblob: bool = False):
         req = syscalls_pb2.Syscall(dentInvoke=syscalls_pb2.DentInvoke(fd=self.fd, payload=payload, sync=sync, parameters=params, toblob=False))
-        self.syscall._send(req)
-        response = self.syscall._recv(syscalls_pb2.DentInvokeResult())
+        response = self.syscall._call(req, syscalls_pb2.DentInvokeResult())
         return response
 
     def ls(self):
-        req = syscalls_pb2.Syscall(dentLsGate=self.fd)
-        self.syscall._send(req)
-        response = self.syscall._recv(syscalls_pb2.DentLsGateResult())
+        req = self.syscall._request()
+        req.dentLsGate = self.fd
+        response = self.syscall._call(req, syscalls_pb2.DentLsGateResult())
         if response.success:
             return _Printer()._MessageToJsonObject(response.gate)
         else:
@@ -207,8 +212,7 @@ class Gate(DirEntry):
             dentUpdate = syscalls_pb2.DentUpdate(
                 fd = self.fd,
                 gate = syscalls_pb2.Gate(direct=directGate)))
-        self.syscall._send(req)
-        return self.syscall._recv(syscalls_pb2.DentResult())
+        return self.syscall._call(req, syscalls_pb2.DentResult())
 
     def update_redirect(self, privilege: syscalls_pb2.Component = None,
                               invoker_clearance: syscalls_pb2.Component = None,
@@ -223,18 +227,19 @@ class Gate(DirEntry):
             dentUpdate = syscalls_pb2.DentUpdate(
                 fd = self.fd,
                 gate = syscalls_pb2.Gate(redirect=redirectGate)))
-        self.syscall._send(req)
-        return self.syscall._recv(syscalls_pb2.DentResult())
+        return self.syscall._call(req, syscalls_pb2.DentResult())
 
 
 class Service(DirEntry):
     def invoke(self, payload: bytes = b"", sync: bool = True, params: dict[str,str] = {}, toblob: bool = False):
         req = syscalls_pb2.Syscall(dentInvoke=syscalls_pb2.DentInvoke(fd=self.fd, payload=payload, sync=sync, parameters=params, toblob=toblob))
-        self.syscall._send(req)
-        response = self.syscall._recv(syscalls_pb2.DentInvokeResult())
+        response = self.syscall._call(req, syscalls_pb2.DentInvokeResult())
         return response
 
 
+# most bytes Blob.read asks the host for in one syscall
+_BLOB_READ_MAX = 256 * 1024
+
 class Blob():
     def __init__(self, fd, length, syscall):
         self.fd = fd
@@ -243,9 +248,13 @@ class Blob():
         self.offset = 0
 
     def _blob_read(self, offset=None, length=None):
-        req = syscalls_pb2.Syscall(blobRead=syscalls_pb2.BlobRead(fd=self.fd, offset=offset, length=length))
-        self.syscall._send(req)
-        response = self.syscall._recv(syscalls_pb2.BlobResult())
+        req = self.syscall._request()
+        req.blobRead.fd = self.fd
+        if offset is not None:
+            req.blobRead.offset = offset
+        if length is not None:
+            req.blobRead.length = length
+        response = self.syscall._call(req, syscalls_pb2.BlobResult())
         if response.success:
             return response.data
         raise ReadBlobError
@@ -258,16 +267,20 @@ class Blob():
             self.offset += len(data)
             return data
         else:
-            buf = bytearray(b'')
+            # never ask past the end of the blob, so that reading the rest
+            # of it does not take an extra round trip to find EOF
+            if self.length is not None:
+                size = min(size, self.length - self.offset)
+            chunks = []
             while size > 0:
-                data = self._blob_read(offset=self.offset, length=size)
+                data = self._blob_read(offset=self.offset, length=min(size, _BLOB_READ_MAX))
                 # reaches EOF
                 if len(data) == 0:
-                    return buf
-                buf.extend(data)
+                    break
+                chunks.append(data)
                 self.offset += len(data)
                 size -= len(data)
-            return buf
+            return b''.join(chunks)
 
     def tell(self):
         return self.offset
@@ -282,18 +295,69 @@ class Blob():
 class Syscall():
     def __init__(self, sock):
         self.sock = sock
+        # syscalls are small request/reply messages that Nagle would hold
+        # back on a TCP transport. The VM talks over vsock, which has no
+        # such delay.
+        if getattr(sock, 'family', None) in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # received bytes are buf[:end], starting at a length prefix
+        self._buf = bytearray(_RECV_BUF_SIZE)
+        self._end = 0
+        # outgoing wrapper shared by the frequent syscalls. Replies are
+        # still parsed into fresh messages since callers keep them.
+        self._req = syscalls_pb2.Syscall()
+
+    def _request(self):
+        """Return the cleared outgoing Syscall, valid until the next _send"""
+        self._req.Clear()
+        return self._req
+
+    def _call(self, req, result):
+        """Send the request and parse its reply into the result message"""
+        self._send(req)
+        return self._recv(result)
 
     def _send(self, obj):
         objData = obj.SerializeToString()
-        self.sock.sendall(struct.pack(">I", len(objData)))
-        self.sock.sendall(objData)
+        header = _LEN.pack(len(objData))
+        # the length prefix and the message go out in one system call.
+        # Copying a small message behind the prefix is cheaper than sendmsg.
+        if len(objData) < _SENDMSG_MIN:
+            self.sock.sendall(header + objData)
+            return
+        # sendmsg may stop short, so finish with sendall if it does
+        sent = self.sock.sendmsg([header, objData])
+        if sent < len(header) + len(objData):
+            self.sock.sendall((header + objData)[sent:])
+
+    def _fill(self, n, exact=False):
+        # receive until the buffer holds at least n bytes, reading whatever
+        # is available so that a length prefix and a small message usually
+        # arrive in a single recv. An exact fill instead has the kernel wait
+        # for all of the missing bytes, which a signal may cut short.
+        if n > len(self._buf):
+            self._buf.extend(bytes(n - len(self._buf)))
+        with memoryview(self._buf) as view:
+            while self._end < n:
+                if exact:
+                    received = self.sock.recv_into(view[self._end:n], 0, socket.MSG_WAITALL)
+                else:
+                    received = self.sock.recv_into(view[self._end:])
+                if received == 0:
+                    raise EOFError("syscall socket closed")
+                self._end += received
 
     def _recv(self, obj):
-        data = self.sock.recv(4, socket.MSG_WAITALL)
-        res = struct.unpack(">I", data)
-        objData = recvall(self.sock, res[0])
-
-        obj.ParseFromString(objData)
+        self._fill(_LEN.size)
+        end = _LEN.size + _LEN.unpack_from(self._buf)[0]
+        # the host sends nothing past a reply until the next request, so
+        # the rest of the message is all there is to wait for
+        self._fill(end, exact=True)
+        with memoryview(self._buf) as view:
+            obj.ParseFromString(view[_LEN.size:end])
+        # keep anything received past this message for the next one
+        self._buf[:self._end - end] = self._buf[end:self._end]
+        self._end -= end
         return obj
 
     def request(self):
@@ -301,7 +365,9 @@ class Syscall():
         return self._recv(request)
 
     def respond(self, resp: Response):
-        response = syscalls_pb2.Syscall(response = syscalls_pb2.Response(body = resp.body_to_bytes(), statusCode = resp.status_code()))
+        response = self._request()
+        response.response.body = resp.body_to_bytes()
+        response.response.statusCode = resp.status_code()
         self._send(response)
 
     def root(self):
@@ -309,33 +375,29 @@ class Syscall():
 
     def dent_list(self, fd: int):
         """Returns a JSON object"""
-        req = syscalls_pb2.Syscall(dentList = fd)
-        self._send(req)
-        return self._recv(syscalls_pb2.DentListResult())
+        req = self._request()
+        req.dentList = fd
+        return self._call(req, syscalls_pb2.DentListResult())
 
     def dent_create_dir(self, label: syscalls_pb2.Buckle):
         req = syscalls_pb2.Syscall(
             dentCreate = syscalls_pb2.DentCreate(label = label, directory = syscalls_pb2.Void()))
-        self._send(req)
-        return self._recv(syscalls_pb2.DentResult())
+        return self._call(req, syscalls_pb2.DentResult())
 
     def dent_create_file(self, label: syscalls_pb2.Buckle):
         req = syscalls_pb2.Syscall(
             dentCreate = syscalls_pb2.DentCreate(label = label, file = syscalls_pb2.Void()))
-        self._send(req)
-        return self._recv(syscalls_pb2.DentResult())
+        return self._call(req, syscalls_pb2.DentResult())
 
     def dent_create_faceted(self):
         req = syscalls_pb2.Syscall(
             dentCreate = syscalls_pb2.DentCreate(facetedDirectory = syscalls_pb2.Void()))
-        self._send(req)
-        return self._recv(syscalls_pb2.DentResult())
+        return self._call(req, syscalls_pb2.DentResult())
 
     def dent_create_blob(self, label: syscalls_pb2.Buckle, blobfd: int):
         req = syscalls_pb2.Syscall(
             dentCreate = syscalls_pb2.DentCreate(label = label, blob = blobfd))
-        self._send(req)
-        return self._recv(syscalls_pb2.DentResult())
+        return self._call(req, syscalls_pb2.DentResult())
 
     def dent_create_direct_gate(self, label: syscalls_pb2.Buckle,
                                 privilege: syscalls_pb2.Component,
@@ -359,8 +421,7 @@ class Syscall():
             dentCreate = syscalls_pb2.DentCreate(
                 label = label,
                 gate = syscalls_pb2.Gate(direct=directGate)))
-        self._send(req)
-        return self._recv(syscalls_pb2.DentResult())
+        return self._call(req, syscalls_pb2.DentResult())
 
     def dent_create_redirect_gate(self, label: syscalls_pb2.Buckle,
                                   privilege: syscalls_pb2.Component,
@@ -376,8 +437,7 @@ class Syscall():
             dentCreate = syscalls_pb2.DentCreate(
                 label = label,
                 gate = syscalls_pb2.Gate(redirect=redirectGate)))
-        self._send(req)
-        return self._recv(syscalls_pb2.DentResult())
+        return self._call(req, syscalls_pb2.DentResult())
 
     def dent_create_service(self, label: syscalls_pb2.Buckle,
                             privilege: syscalls_pb2.Component,
@@ -398,74 +458,69 @@ class Syscall():
             dentCreate = syscalls_pb2.DentCreate(
                 label = label,
                 service = service))
-        self._send(req)
-        return self._recv(syscalls_pb2.DentResult())
+        return self._call(req, syscalls_pb2.DentResult())
 
     def link(self, dir_fd: int, target_fd: int, name: str):
-        req = syscalls_pb2.Syscall(
-            dentLink = syscalls_pb2.DentLink(dir_fd = dir_fd, name = name, target_fd = target_fd))
-        self._send(req)
-        return self._recv(syscalls_pb2.DentResult())
+        req = self._request()
+        req.dentLink.dir_fd = dir_fd
+        req.dentLink.name = name
+        req.dentLink.target_fd = target_fd
+        return self._call(req, syscalls_pb2.DentResult())
 
     ## Helpers
 
     def open_at(self, dent: int, name: str) -> syscalls_pb2.DentOpenResult:
-        req = syscalls_pb2.Syscall(dentOpen = syscalls_pb2.DentOpen(fd=dent,name=name))
-        self._send(req)
-        return self._recv(syscalls_pb2.DentOpenResult())
+        req = self._request()
+        req.dentOpen.fd = dent
+        req.dentOpen.name = name
+        return self._call(req, syscalls_pb2.DentOpenResult())
 
     def open_at_facet(self, dent: int, name: str):
-        req = syscalls_pb2.Syscall(dentOpen = syscalls_pb2.DentOpen(fd=dent,name=name))
-        self._send(req)
-        return self._recv(syscalls_pb2.DentResult())
+        req = self._request()
+        req.dentOpen.fd = dent
+        req.dentOpen.name = name
+        return self._call(req, syscalls_pb2.DentResult())
 
 
     ## OLD
 
     def write_key(self, key, value):
         req = syscalls_pb2.Syscall(writeKey = syscalls_pb2.WriteKey(key = key, value = value))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
     def read_key(self, key):
         req = syscalls_pb2.Syscall(readKey = syscalls_pb2.ReadKey(key = key))
-        self._send(req)
-        response = self._recv(syscalls_pb2.ReadKeyResponse())
+        response = self._call(req, syscalls_pb2.ReadKeyResponse())
         return response.value
 
     def read_dir(self, d):
         d = d.encode('utf-8')
         req = syscalls_pb2.Syscall(readDir = syscalls_pb2.ReadDir(dir = d))
-        self._send(req)
-        response = self._recv(syscalls_pb2.ReadDirResponse())
+        response = self._call(req, syscalls_pb2.ReadDirResponse())
         return map(lambda b: b.decode('utf-8'), list(response.keys))
 
     ### label APIs ###
     def get_current_label(self):
         req = syscalls_pb2.Syscall(getCurrentLabel = syscalls_pb2.Void())
-        self._send(req)
-        response = self._recv(syscalls_pb2.Buckle())
+        response = self._call(req, syscalls_pb2.Buckle())
         return response
 
     def taint_with_label(self, label):
         req = syscalls_pb2.Syscall(taintWithLabel = label)
-        self._send(req)
-        response = self._recv(syscalls_pb2.Buckle())
+        response = self._call(req, syscalls_pb2.Buckle())
         return response
 
     def declassify(self, secrecy: syscalls_pb2.Component):
         """Declassify to the target secrecy and leave integrity untouched.
         """
         req = syscalls_pb2.Syscall(declassify = secrecy)
-        self._send(req)
-        response = self._recv(syscalls_pb2.Buckle())
+        response = self._call(req, syscalls_pb2.Buckle())
         return response
 
     def endorse(self, with_priv: syscalls_pb2.Component=None):
         req = syscalls_pb2.Syscall(endorse = syscalls_pb2.Endorse(withPriv=with_priv))
-        self._send(req)
-        response = self._recv(syscalls_pb2.DeclassifyResponse())
+        response = self._call(req, syscalls_pb2.DeclassifyResponse())
         return response.label
 
     def buckle_parse(self, s):
@@ -477,17 +532,16 @@ class Syscall():
         principles with '/'. The backslash character ('\') allows escaping these
         special characters (including itself).
         """
-        req = syscalls_pb2.Syscall(buckleParse = s)
-        self._send(req)
-        response = self._recv(syscalls_pb2.MaybeBuckle())
+        req = self._request()
+        req.buckleParse = s
+        response = self._call(req, syscalls_pb2.MaybeBuckle())
         return response.label
     ### end of label APIs ###
 
     ### gate & privilege ###
     def sub_privilege(self, suffix):
         req = syscalls_pb2.Syscall(subPrivilege = syscalls_pb2.TokenList(tokens = suffix))
-        self._send(req)
-        response = self._recv(syscalls_pb2.Buckle())
+        response = self._call(req, syscalls_pb2.Buckle())
         return response.secrecy
 
     def dup_gate(self, orig, path, policy):
@@ -495,50 +549,43 @@ class Syscall():
         if not ok:
             return False
         req = syscalls_pb2.Syscall(dupGate = syscalls_pb2.DupGate(orig = convert_path(orig), baseDir = convert_path(base), name = name, policy = policy))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
     ### github APIs ###
     def github_rest_get(self, route, toblob=False):
         req = syscalls_pb2.Syscall(githubRest = syscalls_pb2.GithubRest(verb = syscalls_pb2.HttpVerb.GET, route = route, body = None, toblob=toblob))
-        self._send(req)
-        response = self._recv(syscalls_pb2.GithubRestResponse())
+        response = self._call(req, syscalls_pb2.GithubRestResponse())
         return response
 
     def github_rest_post(self, route, body, toblob=False):
         bodyJson = json.dumps(body)
         req = syscalls_pb2.Syscall(githubRest = syscalls_pb2.GithubRest(verb = syscalls_pb2.HttpVerb.POST, route = route, body = bodyJson, toblob=toblob))
-        self._send(req)
-        response = self._recv(syscalls_pb2.GithubRestResponse())
+        response = self._call(req, syscalls_pb2.GithubRestResponse())
         return response
 
     def github_rest_put(self, route, body, toblob=False):
         bodyJson = json.dumps(body)
         req = syscalls_pb2.Syscall(githubRest = syscalls_pb2.GithubRest(verb = syscalls_pb2.HttpVerb.PUT, route = route, body = bodyJson, toblob=toblob))
-        self._send(req)
-        response = self._recv(syscalls_pb2.GithubRestResponse())
+        response = self._call(req, syscalls_pb2.GithubRestResponse())
         return response
 
     def github_rest_delete(self, route, body, toblob=False):
         bodyJson = json.dumps(body)
         req = syscalls_pb2.Syscall(githubRest = syscalls_pb2.GithubRest(verb = syscalls_pb2.HttpVerb.DELETE, route = route, body = bodyJson, toblob=toblob))
-        self._send(req)
-        response = self._recv(syscalls_pb2.GithubRestResponse())
+        response = self._call(req, syscalls_pb2.GithubRestResponse())
         return response
     ### end of github APIs ###
 
     def invoke(self, gate, payload):
         req = syscalls_pb2.Syscall(invoke = syscalls_pb2.Invoke(gate = convert_path(gate), payload = payload))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
     def invoke_service(self, service, body):
         bodyJson = json.dumps(body)
         req = syscalls_pb2.Syscall(invokeService = syscalls_pb2.InvokeService(serv = convert_path(service), body = bodyJson))
-        self._send(req)
-        response = self._recv(syscalls_pb2.ServiceResponse())
+        response = self._call(req, syscalls_pb2.ServiceResponse())
         return response
 
     ###  cloud calls: fs ###
@@ -548,16 +595,14 @@ class Syscall():
         or a faceted directory. If a faceted directory then the facet named
         by the function's label at the time of linking is used."""
         req = syscalls_pb2.Syscall(fsHardLink = syscalls_pb2.FSHardLink(src=src, dest=dest))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
 
     def fs_list(self, path: str):
         """Returns a JSON object"""
         req = syscalls_pb2.Syscall(fsList = syscalls_pb2.FSList(path=path))
-        self._send(req)
-        response = self._recv(syscalls_pb2.FSListResponse())
+        response = self._call(req, syscalls_pb2.FSListResponse())
         if response.value is not None:
             return json.loads(MessageToJson(response.value))
         return None
@@ -565,8 +610,7 @@ class Syscall():
     def fs_faceted_list(self, path: str):
         """Returns a JSON object"""
         req = syscalls_pb2.Syscall(fsFacetedList = syscalls_pb2.FSFacetedList(path=path))
-        self._send(req)
-        response = self._recv(syscalls_pb2.FSFacetedListResponse())
+        response = self._call(req, syscalls_pb2.FSFacetedListResponse())
         if response.value is not None:
             return MessageToJson(response.value)
         return None
@@ -579,8 +623,7 @@ class Syscall():
             None: otherwise
         """
         req = syscalls_pb2.Syscall(fsRead = syscalls_pb2.FSRead(path=path))
-        self._send(req)
-        response = self._recv(syscalls_pb2.ReadKeyResponse())
+        response = self._call(req, syscalls_pb2.ReadKeyResponse())
         return response.value
 
     @contextmanager
@@ -592,8 +635,7 @@ class Syscall():
             None: otherwise
         """
         req = syscalls_pb2.Syscall(fsOpenBlob = syscalls_pb2.FSOpenBlob(path=path))
-        self._send(req)
-        response = self._recv(syscalls_pb2.FSOpenBlobResponse())
+        response = self._call(req, syscalls_pb2.FSOpenBlobResponse())
         if response.name:
             with self.open_blob(response.name) as blob:
                 yield blob
@@ -608,8 +650,7 @@ class Syscall():
             bool: True for success, False otherwise
         """
         req = syscalls_pb2.Syscall(fsWrite = syscalls_pb2.FSWrite(path=path, data=data))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
     def fs_createdir(self, path: str, label: str=None):
@@ -620,8 +661,7 @@ class Syscall():
             bool: True for success, False otherwise
         """
         req = syscalls_pb2.Syscall(fsCreateDir=syscalls_pb2.FSCreateDir(path=path, label=label))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
     def fs_createfile(self, path: str, label: str=None):
@@ -632,8 +672,7 @@ class Syscall():
             bool: True for success, False otherwise
         """
         req = syscalls_pb2.Syscall(fsCreateFile = syscalls_pb2.FSCreateFile(path=path, label=label))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
     def fs_createfaceted(self, path: str):
@@ -644,39 +683,33 @@ class Syscall():
             bool: True for success, False otherwise
         """
         req = syscalls_pb2.Syscall(fsCreateFacetedDir = syscalls_pb2.FSCreateFacetedDir(path=path))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
     def fs_linkblob(self, path, blobname: str, label: str=None):
         """Link `blobname` into the file system at `path`."""
         req = syscalls_pb2.Syscall(fsCreateBlobByName=syscalls_pb2.FSCreateBlobByName(path=path, blobname=blobname, label=label))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
     def fs_creategate(self, path: str, policy: str, app: str, memory: int, runtime: str):
         req = syscalls_pb2.Syscall(fsCreateGate=syscalls_pb2.FSCreateGate(path=path, policy=policy, appImage=app, memory=memory, runtime=runtime))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
     def fs_createredirectgate(self, path: str, policy: str, redirect_path: str):
         req = syscalls_pb2.Syscall(fsCreateRedirectGate=syscalls_pb2.FSCreateRedirectGate(path=path, policy=policy, redirectPath=redirect_path))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
     def fs_createservice(self, path: str, policy: str, label: str, url: str, verb: str, headers: str):
         req = syscalls_pb2.Syscall(fsCreateService=syscalls_pb2.FSCreateService(path=path, policy=policy, label=label, url=url, verb=verb, headers=headers))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
     def fs_delete(self, path: str):
         req = syscalls_pb2.Syscall(fsDelete = syscalls_pb2.FSDelete(path=path))
-        self._send(req)
-        response = self._recv(syscalls_pb2.WriteKeyResponse())
+        response = self._call(req, syscalls_pb2.WriteKeyResponse())
         return response.success
 
     ### end of named data object syscalls ###
@@ -692,14 +725,12 @@ class Syscall():
             An instance of class NewBlob
         """
         req = syscalls_pb2.Syscall(blobCreate=syscalls_pb2.BlobCreate(size=size))
-        self._send(req)
-        response = self._recv(syscalls_pb2.BlobResult())
+        response = self._call(req, syscalls_pb2.BlobResult())
         if response.success:
             fd = response.fd
             yield NewBlob(fd, self)
             syscalls_pb2.Syscall(blobClose=syscalls_pb2.BlobClose(fd=fd))
-            self._send(req)
-            response = self._recv(syscalls_pb2.BlobResult())
+            response = self._call(req, syscalls_pb2.BlobResult())
         else:
             raise CreateBlobError
 
@@ -711,21 +742,18 @@ class Syscall():
             An instance of class Blob
         """
         req = syscalls_pb2.Syscall(openBlob=syscalls_pb2.BlobOpen(name=name))
-        self._send(req)
-        response = self._recv(syscalls_pb2.BlobResult())
+        response = self._call(req, syscalls_pb2.BlobResult())
         fd = response.fd
         yield Blob(fd, self)
         req = syscalls_pb2.Syscall(closeBlob=syscalls_pb2.BlobClose(fd=fd))
-        self._send(req)
-        response = self._recv(syscalls_pb2.BlobResult())
+        response = self._call(req, syscalls_pb2.BlobResult())
     ### end of unnamed object syscalls ###
 
     ### return direntry handle ###
     @contextmanager
     def create_file(self, path: str, label: str=None):
         req = syscalls_pb2.Syscall(createFile = syscalls_pb2.CreateFile(path=path, label=label))
-        self._send(req)
-        response = self._recv(syscalls_pb2.DentResponse())
+        response = self._call(req, syscalls_pb2.DentResponse())
         if response.success:
             yield File(response.dentFd, self)
             req = syscalls_pb2.Syscall(dentClose=syscalls_pb2.DentClose(dentFd=response.dentFd))
@@ -733,21 +761,40 @@ class Syscall():
         else:
             raise CreateFileError
 
+# bytes written to a NewBlob are sent to the host once this many are pending
+_BLOB_WRITE_MAX = 256 * 1024
+
 class NewBlob():
     def __init__(self, fd, syscall):
         self.fd = fd
         self.syscall = syscall
+        self._pending = bytearray()
 
     def write(self, data):
-        req = syscalls_pb2.Syscall(blobWrite=syscalls_pb2.BlobWrite(fd=self.fd, data=data))
-        self.syscall._send(req)
-        response = self.syscall._recv(syscalls_pb2.BlobResult())
+        """Buffer data for the blob, sending it to the host once enough is
+        pending. Returns False if sending failed"""
+        self._pending += data
+        if len(self._pending) < _BLOB_WRITE_MAX:
+            return True
+        return self.flush()
+
+    def flush(self):
+        """Send all pending data to the host. Returns False if that failed"""
+        if not self._pending:
+            return True
+        req = self.syscall._request()
+        req.blobWrite.fd = self.fd
+        req.blobWrite.data = bytes(self._pending)
+        self._pending.clear()
+        response = self.syscall._call(req, syscalls_pb2.BlobResult())
         return response.success
 
     def finalize(self, data):
-        req = syscalls_pb2.Syscall(blobFinalize=syscalls_pb2.BlobFinalize(fd=self.fd))
-        self.syscall._send(req)
-        response = self.syscall._recv(syscalls_pb2.BlobResult())
+        if not self.flush():
+            raise WriteBlobError
+        req = self.syscall._request()
+        req.blobFinalize.fd = self.fd
+        response = self.syscall._call(req, syscalls_pb2.BlobResult())
         return response.data.decode("utf-8")
 
 class CreateBlobError(Exception):
@@ -756,6 +803,9 @@ class CreateBlobError(Exception):
 class ReadBlobError(Exception):
     pass
 
+class WriteBlobError(Exception):
+    pass
+
 class CreateFileError(Exception):
     pass
 
@@ -19,6 +19,10 @@ sc = Syscall(sock)
 while True:
     try:
         request = sc.request()
+    except (OSError, EOFError):
+        # the connection to the host is gone, so there is no one to respond to
+        sys.exit(1)
+    try:
         response = app.handle(sc, payload=request.payload, blobs=request.blobs, headers=request.headers, invoker=request.invoker)
         assert(isinstance(response, Response))
         sc.respond(response)